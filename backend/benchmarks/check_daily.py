@@ -0,0 +1,105 @@
+"""
+Daily Korea data check.
+
+Generates the synthetic data twice with the same seed, once with monthly and
+once with daily (`YYYY-M-D`) Korea files, and checks that the values derived
+from them at load time are the same: the monthly visitors matrix, the age
+and purpose breakdowns and the source market rankings. Exits with status 1
+when they differ.
+
+    python benchmarks/check_daily.py
+    python benchmarks/check_daily.py --scale 10 --seed 3
+"""
+import argparse
+import contextlib
+import io
+import pathlib
+import sys
+import tempfile
+
+import numpy as np
+
+import generate_data
+
+SRC_DIR = pathlib.Path(__file__).resolve().parent.parent / 'src'
+sys.path.insert(0, str(SRC_DIR))
+
+from app import create_app  # noqa: E402
+
+
+def derived(data_dir):
+    """
+    The Korea values derived from the files in `data_dir`.
+    """
+    app = create_app(settings_override={'DATA_DIR': data_dir, 'DATASETS_CACHE_DIR': '', 'METRICS_DIR': ''})
+
+    with app.app_context():
+        store = app.extensions['datasets']
+        return {
+            'monthly_visitors': store['monthly_visitors_KOR'],
+            'korea_age_breakdown': store['korea_age_breakdown'],
+            'korea_purpose_breakdown': store['korea_purpose_breakdown'],
+            'korea_source_markets': store['korea_source_markets'],
+        }
+
+
+def differences(monthly, daily):
+    """
+    Names of the arrays that differ between the monthly and the daily values.
+    """
+    matrix, daily_matrix = monthly['monthly_visitors'], daily['monthly_visitors']
+    checks = {
+        'monthly_visitors.years': np.array_equal(matrix.years, daily_matrix.years),
+        'monthly_visitors.values': np.array_equal(matrix.values, daily_matrix.values, equal_nan=True),
+        'monthly_visitors.present': np.array_equal(matrix.present, daily_matrix.present),
+        'monthly_visitors.changes': np.allclose(matrix.changes, daily_matrix.changes, equal_nan=True),
+    }
+
+    for name in ('korea_age_breakdown', 'korea_purpose_breakdown'):
+        breakdown, daily_breakdown = monthly[name], daily[name]
+        checks[f'{name}.nations'] = np.array_equal(breakdown.nations, daily_breakdown.nations)
+        checks[f'{name}.values'] = np.array_equal(breakdown.values, daily_breakdown.values)
+        # daily files have a row per day: compare which cells have data.
+        checks[f'{name}.rows'] = np.array_equal(breakdown.rows > 0, daily_breakdown.rows > 0)
+
+    markets, daily_markets = monthly['korea_source_markets'], daily['korea_source_markets']
+    checks['korea_source_markets.visitors'] = np.array_equal(markets.visitors, daily_markets.visitors)
+    checks['korea_source_markets.growth'] = np.allclose(markets.growth, daily_markets.growth, equal_nan=True)
+    checks['korea_source_markets.order'] = np.array_equal(markets.order, daily_markets.order)
+    checks['korea_source_markets.counts'] = np.array_equal(markets.counts, daily_markets.counts)
+
+    return [name for name, same in checks.items() if not same]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0].strip())
+    parser.add_argument('--scale', type=int, default=1)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        values = {}
+
+        for granularity in ('monthly', 'daily'):
+            output = pathlib.Path(tmp) / granularity
+            options = ['--scale', str(args.scale), '--seed', str(args.seed), '--output', str(output)]
+
+            with contextlib.redirect_stdout(io.StringIO()):
+                generate_data.main(options + (['--daily'] if granularity == 'daily' else []))
+
+            values[granularity] = derived(output)
+
+        different = differences(values['monthly'], values['daily'])
+
+    for name in different:
+        print(f'DIFFERENT {name}')
+
+    if different:
+        return 1
+
+    print('daily Korea files give the same monthly values, breakdowns and source markets')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
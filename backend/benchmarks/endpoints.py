@@ -0,0 +1,241 @@
+"""
+Endpoint benchmark.
+
+Builds the app with `create_app(settings_override=...)` and requests every
+route registered in `api/__init__.py` through the Flask test client: report
+routes for each year of their datasets, and the country routes for every
+country code and every year (the resource's own countries, when it lists
+them). With `--sample`, at most that many URLs of each route are requested,
+drawn with a fixed `--seed` so that runs stay comparable. Reports per route
+p50/p95/p99 latency, throughput and errors, and the peak RSS of the process,
+optionally as JSON to diff between commits.
+
+With `--baseline`, exits with status 1 when a route got slower than in the
+baseline by more than `--threshold` percent.
+
+    python benchmarks/endpoints.py --output before.json
+    python benchmarks/endpoints.py --baseline before.json --threshold 10
+    python benchmarks/endpoints.py --sample 200 --seed 1
+"""
+import argparse
+import json
+import pathlib
+import platform
+import random
+import resource
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+SRC_DIR = pathlib.Path(__file__).resolve().parent.parent / 'src'
+sys.path.insert(0, str(SRC_DIR))
+
+from app import create_app  # noqa: E402
+from api.reports.data import get_country_mapping  # noqa: E402
+from commons.resources import ReportResource  # noqa: E402
+
+
+def dataset_years(store, name):
+    """
+    Years present in dataset `name`, or an empty list if it cannot be loaded.
+    """
+    try:
+        table = store[name]
+    except Exception:
+        return []
+
+    for column in ('year', 'Year'):
+        if column in table:
+            return sorted(int(year) for year in table.unique(column).tolist())
+
+    return []
+
+
+def route_urls(app, sample=None, seed=0):
+    """
+    URLs to request for each route: `(rule, [url, ...])`; at most `sample`
+    of them per route, drawn reproducibly from `seed`.
+    """
+    store = app.extensions['datasets']
+    countries = sorted(set(get_country_mapping().values()))
+
+    for rule in sorted(app.url_map.iter_rules(), key=lambda rule: rule.rule):
+        if rule.endpoint == 'static' or 'GET' not in rule.methods:
+            continue
+
+        view = app.view_functions[rule.endpoint]
+        resource_class = getattr(view, 'view_class', None)
+
+        # routes of per-country data sources list their own country codes.
+        codes = resource_class.country_codes() if hasattr(resource_class, 'country_codes') else countries
+
+        if rule.arguments == {'country_code'}:
+            paths = [rule.rule.replace('<string:country_code>', code) for code in codes]
+        else:
+            paths = [rule.rule]
+
+        years = []
+
+        if resource_class is not None and issubclass(resource_class, ReportResource):
+            if hasattr(resource_class, 'country_datasets'):
+                names = {name for code in codes for name in resource_class.country_datasets(code)}
+            else:
+                names = resource_class.depends_on
+
+            years = sorted({year for name in names for year in dataset_years(store, name)})
+
+        urls = paths + [f'{path}?year={year}' for path in paths for year in years]
+
+        if sample and len(urls) > sample:
+            urls = sorted(random.Random(f'{seed}:{rule.rule}').sample(urls, sample))
+
+        yield rule.rule, urls
+
+
+def measure(client, urls, repeat, warmup):
+    latencies, statuses = [], {}
+
+    for url in urls:
+        for _ in range(warmup):
+            client.get(url)
+
+        for _ in range(repeat):
+            started = time.perf_counter()
+            response = client.get(url)
+            latencies.append(time.perf_counter() - started)
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+    latencies = np.array(latencies) * 1000
+    return {
+        'requests': len(latencies),
+        'urls': len(urls),
+        'p50_ms': round(float(np.percentile(latencies, 50)), 3),
+        'p95_ms': round(float(np.percentile(latencies, 95)), 3),
+        'p99_ms': round(float(np.percentile(latencies, 99)), 3),
+        'mean_ms': round(float(latencies.mean()), 3),
+        'throughput_rps': round(len(latencies) / (latencies.sum() / 1000), 1),
+        'statuses': {str(status): count for status, count in sorted(statuses.items())},
+    }
+
+
+def peak_rss():
+    """
+    Peak resident set size of this process, in bytes.
+    """
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS.
+    return rss if sys.platform == 'darwin' else rss * 1024
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=SRC_DIR, stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def regressions(results, baseline, metric, threshold):
+    """
+    Routes slower than in `baseline` by more than `threshold` percent.
+    """
+    for route, stats in results['routes'].items():
+        before = baseline.get('routes', {}).get(route)
+
+        if not before or not before.get(metric):
+            continue
+
+        change = (stats[metric] - before[metric]) / before[metric] * 100
+
+        if change > threshold:
+            yield route, before[metric], stats[metric], change
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0].strip())
+    parser.add_argument('--data-dir', type=pathlib.Path, help='directory of the source files (default: DATA_DIR)')
+    parser.add_argument('--repeat', type=int, default=5, help='timed requests per URL')
+    parser.add_argument('--warmup', type=int, default=1, help='untimed requests per URL before timing')
+    parser.add_argument('--cache', action='store_true', help='keep the report result cache enabled')
+    parser.add_argument('--route', action='append', help='benchmark only these routes (repeatable)')
+    parser.add_argument('--sample', type=int, help='request at most this many URLs per route')
+    parser.add_argument('--seed', type=int, default=0, help='seed of the URL sample')
+    parser.add_argument('--output', type=pathlib.Path, help='write the results as JSON to this file')
+    parser.add_argument('--baseline', type=pathlib.Path, help='results of a previous run to compare with')
+    parser.add_argument('--threshold', type=float, default=10.0, help='allowed slowdown, in percent')
+    parser.add_argument('--metric', default='p50_ms', choices=['p50_ms', 'p95_ms', 'p99_ms', 'mean_ms'])
+    args = parser.parse_args(argv)
+
+    settings = {
+        'DEBUG': False,
+        'REPORTS_CACHE': args.cache,
+        'REPORTS_COALESCE': False,
+        'DIAGNOSTICS_LEVEL': 'WARNING',
+        'DIAGNOSTICS_REQUESTS': False,
+        'SERVER_TIMING': False,
+        'SERVER_TIMING_LOG': '',
+        'METRICS_DIR': '',
+    }
+
+    if args.data_dir:
+        settings['DATA_DIR'] = args.data_dir.resolve()
+
+    started = time.perf_counter()
+    app = create_app(settings_override=settings)
+    client = app.test_client()
+    results = {
+        'meta': {
+            'commit': git_commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'data_dir': str(app.config['DATA_DIR']),
+            'repeat': args.repeat,
+            'warmup': args.warmup,
+            'cache': args.cache,
+            'sample': args.sample,
+            'seed': args.seed,
+        },
+        'routes': {},
+    }
+
+    print(f'{"route":<56}{"urls":>6}{"p50 ms":>10}{"p95 ms":>10}{"p99 ms":>10}{"req/s":>10}  statuses')
+
+    for route, urls in route_urls(app, args.sample, args.seed):
+        if args.route and route not in args.route:
+            continue
+
+        stats = measure(client, urls, args.repeat, args.warmup)
+
+        results['routes'][route] = stats
+        print(
+            f'{route:<56}{stats["urls"]:>6}{stats["p50_ms"]:>10.2f}{stats["p95_ms"]:>10.2f}'
+            f'{stats["p99_ms"]:>10.2f}{stats["throughput_rps"]:>10.1f}  {stats["statuses"]}'
+        )
+
+    results['peak_rss_bytes'] = peak_rss()
+    results['elapsed_s'] = round(time.perf_counter() - started, 2)
+    print(f'\npeak RSS: {results["peak_rss_bytes"] / 2 ** 20:.1f} MiB, elapsed: {results["elapsed_s"]} s')
+
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2) + '\n')
+
+    if args.baseline:
+        slower = list(regressions(results, json.loads(args.baseline.read_text()), args.metric, args.threshold))
+
+        for route, before, after, change in slower:
+            print(f'REGRESSION {route}: {args.metric} {before:.2f} -> {after:.2f} (+{change:.1f}%)')
+
+        if slower:
+            return 1
+
+        print(f'no route slower than the baseline by more than {args.threshold}% ({args.metric})')
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,375 @@
+"""
+Synthetic data generator.
+
+Writes source files with the schemas of the bundled data, at a multiple of
+its size, into a directory laid out like DATA_DIR:
+
+* the UN Tourism arrivals (by partner area) and expenditure CSVs, with
+  `--scale` partner areas per reporter: World plus regions and countries,
+  as the planned partner-area feeds will have;
+* the Japan (JTM) monthly file, with `--scale` rows per month that add up
+  to the month's visitors;
+* the Korea monthly files by age and by purpose, with the same visitors,
+  for `--scale` times as many source markets; with `--daily`, one row per
+  day (`YYYY-M-D`) whose days add up to the monthly figures.
+
+Coverage is sparse like the real data: reporters start reporting in
+different years, skip years, lack some indicators entirely (so the
+indicator priority fallbacks are exercised), and a few values are missing
+or flagged. Output is deterministic for a given `--seed`.
+
+    python benchmarks/generate_data.py --scale 10 --output /tmp/data-10x
+    python benchmarks/endpoints.py --data-dir /tmp/data-10x
+"""
+import argparse
+import calendar
+import math
+import pathlib
+import sys
+
+import numpy as np
+import pandas as pd
+
+SRC_DIR = pathlib.Path(__file__).resolve().parent.parent / 'src'
+sys.path.insert(0, str(SRC_DIR))
+
+from api.reports.data import get_country_mapping  # noqa: E402
+
+
+UN_COLUMNS = [
+    'indicator_code', 'indicator_label', 'indicator_previous_code', 'reporter_area_code', 'reporter_area_label',
+    'partner_area_code', 'partner_area_label', 'year', 'value', 'flag', 'flag_label', 'unit', 'notes', 'drop',
+]
+
+# code: (label, previous code, share of the reporter's total, probability the reporter lacks it)
+ARRIVALS = {
+    'INBD_TRIP_AREA_TOTL_TOUR': ('inbound - trips - total - overnight visitors (tourists)', 'CP_1_13', 1.0, 0.35),
+    'INBD_TRIP_AREA_TOUR_ABRD': (
+        'inbound - trips - by area of residence - overnight visitors (tourists)', 'CP_1_16', 0.93, 0.45
+    ),
+    'INBD_TRIP_REGN_TOUR': ('inbound - trips - by region - overnight visitors (tourists)', 'CP_1_17', 0.88, 0.55),
+    'INBD_TRIP_PRPS_TOTL_TOUR': (
+        'inbound - trips - by purpose - total - overnight visitors (tourists)', 'CP_1_14', 1.0, 0.6
+    ),
+    'INBD_TRIP_PRPS_PERS_TOUR': (
+        'inbound - trips - by purpose - personal - overnight visitors (tourists)', 'CP_1_15', 0.75, 0.6
+    ),
+    'INBD_TRIP_PRPS_BNSS_TOUR': (
+        'inbound - trips - by purpose - business - overnight visitors (tourists)', 'CP_1_18', 0.25, 0.6
+    ),
+}
+
+EXPENDITURE = {
+    'INBD_EXPD_BPAY_TOTL_VSTR': ('inbound - expenditure - balance of payments - total - visitors', 'CP_1_33', 1.0, 0.15),
+    'INBD_EXPD_BPAY_TRVL_VSTR': ('inbound - expenditure - balance of payments - travel - visitors', 'CP_1_34', 0.8, 0.05),
+    'INBD_EXPD_BPAY_PSTR_VSTR': (
+        'inbound - expenditure - balance of payments - passenger transport - visitors', 'CP_1_35', 0.2, 0.3
+    ),
+}
+
+REGIONS = ['Africa', 'Americas', 'Asia and the Pacific', 'Europe', 'Middle East']
+
+# demand shocks by year, relative to the trend.
+SHOCKS = {2001: 0.97, 2009: 0.95, 2020: 0.28, 2021: 0.35, 2022: 0.7, 2023: 0.92}
+
+MONTHS = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
+
+# relative monthly demand.
+SEASON = np.array([0.85, 0.82, 0.98, 1.05, 1.0, 0.97, 1.12, 1.15, 1.0, 1.07, 0.98, 0.9])
+
+KOREA_NATIONS = [
+    'China', 'Japan', 'Taiwan', 'Hong Kong', 'Macao', 'Phillipines', 'Indonesia', 'Thailand', 'Vietnam', 'India',
+    'Malaysia', 'Singapore', 'Mongolia', 'Uzbekistan', 'Myanmar', '*GCC', 'Kazakhstan', 'Turkey', 'Cambodia',
+    'Sri Lanka', 'Bangladesh', 'Pakistan', 'Israel', 'Iran', 'Asia others', 'USA', 'Canada', 'Brazil', 'Mexico',
+    'America others', 'Russia', 'UK', 'Germany', 'France', 'Italy', 'Netherland', 'Ukraine', 'Spain', 'Romania',
+    'Norway', 'Sweden', 'Poland', 'Swiss', 'Portugal', 'Austria', 'Finland', 'Belgium', 'Croatia', 'Greece',
+    'Bulgaria', 'Denmark', 'Ireland', 'Europe others', 'Austrailia', 'New Zealand', 'Oceania others', 'South Africa',
+    'Africa others', 'Stateless', 'Overseas Korean',
+]
+
+KOREA_AGES = ['age0-20', 'age21-30', 'age31-40', 'age41-50', 'age51-60', 'age61']
+
+KOREA_PURPOSES = ['tourism', 'business', 'official affairs', 'studying', 'others']
+
+
+def year_trend(years):
+    trend = np.exp(0.04 * (years - 2010))
+    return trend * np.array([SHOCKS.get(int(year), 1.0) for year in years])
+
+
+class Reporters:
+    """
+    Reporting countries with their size and reporting habits.
+    """
+
+    def __init__(self, rng, years):
+        self.labels = np.array(sorted(get_country_mapping()))
+        self.codes = np.arange(4, 4 + 4 * len(self.labels), 4)
+        n = len(self.labels)
+
+        # thousand overnight visitors in 2010 and spending per visitor in US dollars.
+        self.size = rng.lognormal(math.log(1500), 1.6, n)
+        self.spending = rng.lognormal(math.log(900), 0.6, n)
+
+        # first year reported and share of the later years reported.
+        self.first_year = rng.choice(years, n, p=self._first_year_weights(years))
+        self.coverage = rng.beta(8, 1, n)
+
+    @staticmethod
+    def _first_year_weights(years):
+        weights = np.where(years == years[0], 20.0, 1.0)
+        return weights / weights.sum()
+
+
+def partner_areas(scale):
+    """
+    World, then regions, countries and synthetic areas: `scale` in total.
+    """
+    names = ['World'] + REGIONS + sorted(get_country_mapping())
+    names += [f'Partner area {i:04d}' for i in range(len(names), scale)]
+    return names[:scale]
+
+
+def un_rows(rng, reporters, years, indicators, partner, partner_code, shares, unit, value_of):
+    """
+    Rows of one partner area for every reporter, year and indicator.
+    """
+    n, m = len(reporters.labels), len(years)
+    frames = []
+
+    # reporters that break their figures down by this partner area at all.
+    reporting = np.ones(n, bool) if partner == 'World' else rng.random(n) < 0.6
+
+    for code, (label, previous_code, share, missing) in indicators.items():
+        has_indicator = reporting & (rng.random(n) >= missing)
+        present = (
+            has_indicator[:, None]
+            & (years[None, :] >= reporters.first_year[:, None])
+            & (rng.random((n, m)) < reporters.coverage[:, None])
+        )
+        rows, columns = np.nonzero(present)
+
+        if len(rows) == 0:
+            continue
+
+        values = value_of(rows, columns) * share * shares[rows] * rng.lognormal(0, 0.05, len(rows))
+        values = np.round(values, 1)
+        values[rng.random(len(rows)) < 0.004] = np.nan
+
+        flags = rng.random(len(rows))
+        flag = np.where(flags < 0.03, 'P', np.where(flags < 0.04, 'D', ''))
+        flag_label = np.where(flag == 'P', 'Provisional value', np.where(flag == 'D', 'Definition differs', ''))
+
+        frames.append(pd.DataFrame({
+            'indicator_code': code,
+            'indicator_label': label,
+            'indicator_previous_code': previous_code,
+            'reporter_area_code': reporters.codes[rows],
+            'reporter_area_label': reporters.labels[rows],
+            'partner_area_code': partner_code,
+            'partner_area_label': partner,
+            'year': years[columns],
+            'value': values,
+            'flag': flag,
+            'flag_label': flag_label,
+            'unit': unit,
+            'notes': '',
+            'drop': '',
+        }, columns=UN_COLUMNS))
+
+    return pd.concat(frames) if frames else pd.DataFrame(columns=UN_COLUMNS)
+
+
+def write_un(rng, path, reporters, years, partners, indicators, unit, value_of):
+    """
+    Write one partner area at a time, so memory stays flat at any scale.
+    """
+    n = len(reporters.labels)
+    # share of each reporter's visitors coming from each partner area.
+    other_shares = rng.dirichlet(np.full(max(len(partners) - 1, 1), 0.5), n)
+    rows = 0
+
+    for position, partner in enumerate(partners):
+        shares = np.ones(n) if partner == 'World' else other_shares[:, position - 1]
+        partner_code = 999 if partner == 'World' else 1000 + position
+        frame = un_rows(rng, reporters, years, indicators, partner, partner_code, shares, unit, value_of)
+        if position == 0:
+            # with a byte order mark, like the published files.
+            frame.to_csv(path, index=False, encoding='utf-8-sig')
+        else:
+            frame.to_csv(path, mode='a', header=False, index=False)
+        rows += len(frame)
+
+    return rows
+
+
+def write_japan(rng, path, years, scale):
+    """
+    JTM layout: the first month of each year is labelled '1996　Jan．', the
+    others 'Feb．'; totals have thousands separators; yearly totals follow.
+
+    Each month is written as `scale` rows (sub-series such as ports of
+    entry) that add up to the month's total and repeat its change, so the
+    row count scales while the years follow `--first-year`/`--last-year`.
+    """
+    monthly = np.outer(320000 * year_trend(np.clip(years, 1996, None)) / year_trend(np.array([1996]))[0], SEASON)
+    monthly = np.round(monthly * rng.lognormal(0, 0.04, monthly.shape)).astype(np.int64)
+    parts = _split(rng, monthly, np.ones(scale))
+
+    lines = ['﻿Monthly ,Grand Total,%Change']
+
+    for i, year in enumerate(years):
+        for month in range(12):
+            change = f'{(monthly[i, month] / monthly[i - 1, month] - 1) * 100:.1f}%' if i > 0 else ''
+
+            for k in range(scale):
+                label = f'{year}　{MONTHS[month]}．' if month == 0 and k == 0 else f'{MONTHS[month]}．'
+                lines.append(f'{label},"{parts[i, month, k]:,}",{change}')
+
+    totals = monthly.sum(axis=1)
+
+    for i, year in enumerate(years):
+        change = f'{(totals[i] / totals[i - 1] - 1) * 100:.1f}%' if i > 0 else ''
+        lines.append(f'{year},"{totals[i]:,}",{change}')
+
+    path.write_text('\n'.join(lines) + '\n', encoding='utf-8')
+    return len(years) * (12 * scale + 1)
+
+
+def write_korea(rng, age_path, purpose_path, scale, first_year=2019, months=16, daily=False):
+    """
+    Korea entries by source market per month (`YYYY-M`), split by age group
+    and by purpose in two files with the same visitors; per day (`YYYY-M-D`)
+    with `daily`.
+    """
+    nations = KOREA_NATIONS + [f'Nation {i:04d}' for i in range(len(KOREA_NATIONS), len(KOREA_NATIONS) * scale)]
+    n = len(nations)
+    size = rng.lognormal(math.log(20000), 1.4, n)
+    periods = [(first_year + i // 12, i % 12 + 1) for i in range(months)]
+    years = np.array([year for year, _ in periods])
+
+    visitors = np.outer(size, SEASON[[month - 1 for _, month in periods]] * year_trend(years))
+    visitors = np.round(visitors * rng.lognormal(0, 0.08, visitors.shape)).astype(np.int64)
+    previous = visitors / rng.lognormal(0.05, 0.15, visitors.shape)
+
+    growth = (visitors / previous - 1) * 100
+    share = visitors / visitors.sum(axis=0, keepdims=True) * 100
+    ages = _split(rng, visitors, [1.0, 3.0, 2.5, 1.8, 1.4, 0.9])
+    purposes = _split(rng, visitors, [30.0, 1.5, 0.1, 1.0, 4.0])
+
+    nation_index, period_index = np.meshgrid(np.arange(n), np.arange(months), indexing='ij')
+    nation_index, period_index = nation_index.ravel(order='F'), period_index.ravel(order='F')
+    common = pd.DataFrame({
+        'date': [f'{periods[i][0]}-{periods[i][1]}' for i in period_index],
+        'nation': np.array(nations)[nation_index],
+        'visitor': visitors[nation_index, period_index],
+        'growth': growth[nation_index, period_index],
+        'share': share[nation_index, period_index],
+    })
+
+    by_age = common.assign(**{name: ages[..., k][nation_index, period_index] for k, name in enumerate(KOREA_AGES)})
+    by_purpose = common.assign(
+        **{name: purposes[..., k][nation_index, period_index] for k, name in enumerate(KOREA_PURPOSES)}
+    )
+
+    if daily:
+        # the same days in both files, so they keep the same visitors.
+        share = _day_shares(rng, common['date'])
+        by_age = _daily(by_age, share, ['visitor'] + KOREA_AGES)
+        by_purpose = _daily(by_purpose, share, ['visitor'] + KOREA_PURPOSES)
+
+    by_age.to_csv(age_path, index=False)
+    by_purpose.to_csv(purpose_path, index=False)
+    return len(by_age)
+
+
+def _day_shares(rng, dates):
+    """
+    Share of each day of the month of each row: `(rows, share)`, one entry per
+    day, rows repeated for the days of their month.
+    """
+    year_month = dates.str.split('-', expand=True).astype(int)
+    days = np.array([calendar.monthrange(year, month)[1] for year, month in year_month.itertuples(index=False)])
+    rows = np.repeat(np.arange(len(dates)), days)
+    weights = rng.lognormal(0, 0.2, len(rows))
+    return rows, weights / np.bincount(rows, weights)[rows]
+
+
+def _daily(frame, share, columns):
+    """
+    Spread each monthly row over the days of its month, splitting the integer
+    `columns` so that the days add up to the month; other columns repeat.
+    """
+    rows, share = share
+    first_days = np.flatnonzero(np.r_[True, rows[1:] != rows[:-1]])
+    day = np.arange(len(rows)) - np.repeat(first_days, np.diff(np.r_[first_days, len(rows)])) + 1
+
+    daily = frame.iloc[rows].reset_index(drop=True)
+    daily['date'] = daily['date'] + '-' + day.astype(str)
+
+    for column in columns:
+        totals = frame[column].to_numpy(dtype=np.int64)
+        parts = np.floor(totals[rows] * share).astype(np.int64)
+        parts[first_days] += totals - np.bincount(rows, weights=parts, minlength=len(frame)).astype(np.int64)
+        daily[column] = parts
+
+    return daily
+
+
+def _split(rng, totals, weights):
+    """
+    Split each total into integer parts drawn around `weights`.
+    """
+    fractions = rng.dirichlet(np.array(weights) * 20, totals.shape)
+    parts = np.floor(totals[..., None] * fractions).astype(np.int64)
+    parts[..., 0] += totals - parts.sum(axis=-1)
+    return parts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0].strip())
+    parser.add_argument('--scale', type=int, default=10, help='size multiple of the bundled data, e.g. 10, 100, 1000')
+    parser.add_argument('--output', type=pathlib.Path, required=True, help='directory to write the files to')
+    parser.add_argument('--first-year', type=int, default=1995)
+    parser.add_argument('--last-year', type=int, default=2024)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--daily', action='store_true', help='write the Korea files with one row per day')
+    args = parser.parse_args(argv)
+
+    rng = np.random.default_rng(args.seed)
+    years = np.arange(args.first_year, args.last_year + 1)
+    reporters = Reporters(rng, years)
+    partners = partner_areas(args.scale)
+    tourists = reporters.size[:, None] * year_trend(years)[None, :]
+
+    output = args.output
+    (output / 'country_data').mkdir(parents=True, exist_ok=True)
+
+    rows = write_un(
+        rng, output / 'UN_Tourism_inbound_arrivals_by_region_10_2025.csv', reporters, years, partners, ARRIVALS,
+        'thousand trips', lambda rows, columns: tourists[rows, columns]
+    )
+    print(f'arrivals: {rows} rows, {len(partners)} partner areas')
+
+    rows = write_un(
+        rng, output / 'UN_Tourism_inbound_expenditure_10_2025.csv', reporters, years, partners, EXPENDITURE,
+        'million US dollars (nominal values)',
+        lambda rows, columns: tourists[rows, columns] * reporters.spending[rows] / 1000
+    )
+    print(f'expenditure: {rows} rows')
+
+    rows = write_japan(rng, output / 'country_data' / 'JTM_inbound_20251106eng(JAPAN).csv', years, args.scale)
+    print(f'japan monthly: {rows} rows, {args.scale} per month')
+
+    rows = write_korea(
+        rng,
+        output / 'country_data' / 'Enter_korea_by_age(KOREA).csv',
+        output / 'country_data' / 'Enter_korea_by_purpose(KOREA).csv',
+        args.scale, daily=args.daily
+    )
+    print(f'korea {"daily" if args.daily else "monthly"}: {rows} rows per file')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,14 +1,24 @@
+from flask import current_app
 from flask_restful import Api as RestAPI
 
-from api.healthcheck.resources import HealthyCheckResource
+from api.healthcheck.resources import HealthyCheckResource, MetricsResource, ReportCacheResource
 from api import reports
+from commons.metrics import metrics
+from commons.timing import timing
 
 
 class API(RestAPI):
 
     def init_app(self, app):
         super().init_app(app)
+        app.before_request(metrics.start)
+        app.before_request(timing.start)
+        # after_request 由後往前執行，計時最後結束
+        app.after_request(metrics.finish)
+        app.after_request(timing.finish)
         app.after_request(self.add_cors_headers)
+        app.after_request(self.add_cache_headers)
+        app.teardown_request(metrics.teardown)
 
     @staticmethod
     def add_cors_headers(response):
@@ -17,6 +27,21 @@ class API(RestAPI):
         response.headers.add('Access-Control-Allow-Methods', 'GET,PUT,POST,DELETE')
         return response
 
+    @staticmethod
+    def add_cache_headers(response):
+        # 只有帶 ETag 的報表回應可以被快取（含 304）
+        if 'ETag' in response.headers and 'Cache-Control' not in response.headers:
+            config = current_app.config
+            cache_control = f"public, max-age={config.get('REPORTS_MAX_AGE', 60)}"
+            stale = config.get('REPORTS_STALE_WHILE_REVALIDATE', 0)
+
+            if stale:
+                cache_control += f', stale-while-revalidate={stale}'
+
+            response.headers['Cache-Control'] = cache_control
+
+        return response
+
 
 api = API()
 
@@ -25,14 +50,21 @@ api.add_resource(reports.WorldMapDataResource, '/world-map-data')
 api.add_resource(reports.WorldMapExpenditureResource, '/world-map-expenditure')
 api.add_resource(reports.WorldMapAvgSpendingResource, '/world-map-avg-spending')
 api.add_resource(reports.WorldMapCrowdScoreResource, '/world-map-crowd-score')
+api.add_resource(reports.WorldMapBundleResource, '/world-map-bundle')
+api.add_resource(reports.WorldMapSeriesResource, '/world-map-data/series')
 
 # 國家詳細數據
-api.add_resource(reports.JapanMonthlyVisitorsResource, '/country/JPN/monthly-visitors')
-api.add_resource(reports.KoreaMonthlyVisitorsResource, '/country/KOR/monthly-visitors')
+api.add_resource(reports.MonthlyVisitorsCountriesResource, '/monthly-visitors/countries')
+api.add_resource(reports.CountryMonthlyVisitorsResource, '/country/<string:country_code>/monthly-visitors')
+api.add_resource(reports.KoreaBreakdownResource, '/country/KOR/breakdown')
+api.add_resource(reports.KoreaSourceMarketsResource, '/country/KOR/source-markets')
 api.add_resource(
     reports.CountryExpenditureBreakdownResource,
     '/country/<string:country_code>/expenditure-breakdown'
 )
+api.add_resource(reports.CountrySummaryResource, '/country/<string:country_code>/summary')
 
 # 健康檢查
-api.add_resource(HealthyCheckResource, '/healthy')
\ No newline at end of file
+api.add_resource(HealthyCheckResource, '/healthy')
+api.add_resource(ReportCacheResource, '/healthy/reports')
+api.add_resource(MetricsResource, '/metrics')
\ No newline at end of file
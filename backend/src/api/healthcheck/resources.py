@@ -1,3 +1,5 @@
+from flask import current_app
+from flask_restful import abort
 from flask_restful import Resource
 from werkzeug import Response
 
@@ -6,3 +8,32 @@ class HealthyCheckResource(Resource):
 
     def get(self):
         return Response('OK', content_type='text/plain')
+
+
+class ReportCacheResource(Resource):
+    """
+    Report result cache and request coalescing counters of this process.
+    """
+
+    def get(self):
+        cache = current_app.extensions.get('report_cache')
+        flight = current_app.extensions.get('report_flight')
+
+        return {
+            'cache': cache.stats() if cache is not None else None,
+            'coalescing': {'calls': flight.calls, 'shared': flight.shared} if flight is not None else None,
+        }
+
+
+class MetricsResource(Resource):
+    """
+    Metrics of all worker processes in the Prometheus text format.
+    """
+
+    def get(self):
+        registry = current_app.extensions.get('metrics')
+
+        if registry is None:
+            abort(404)
+
+        return Response(registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -2,16 +2,25 @@ from api.reports.world_map_data import WorldMapDataResource
 from api.reports.world_map_expenditure import WorldMapExpenditureResource
 from api.reports.world_map_avg_spending import WorldMapAvgSpendingResource
 from api.reports.world_map_crowd_score import WorldMapCrowdScoreResource
-from api.reports.japan_monthly_visitors import JapanMonthlyVisitorsResource
-from api.reports.korea_monthly_visitors import KoreaMonthlyVisitorsResource
+from api.reports.world_map_bundle import WorldMapBundleResource
+from api.reports.world_map_series import WorldMapSeriesResource
+from api.reports.country_monthly_visitors import CountryMonthlyVisitorsResource, MonthlyVisitorsCountriesResource
+from api.reports.korea_breakdown import KoreaBreakdownResource
+from api.reports.korea_source_markets import KoreaSourceMarketsResource
 from api.reports.country_expenditure_breakdown import CountryExpenditureBreakdownResource
+from api.reports.country_summary import CountrySummaryResource
 
 __all__ = [
     'WorldMapDataResource',
     'WorldMapExpenditureResource',
     'WorldMapAvgSpendingResource',
     'WorldMapCrowdScoreResource',
-    'JapanMonthlyVisitorsResource',
-    'KoreaMonthlyVisitorsResource',
-    'CountryExpenditureBreakdownResource'
+    'WorldMapBundleResource',
+    'WorldMapSeriesResource',
+    'CountryMonthlyVisitorsResource',
+    'MonthlyVisitorsCountriesResource',
+    'KoreaBreakdownResource',
+    'KoreaSourceMarketsResource',
+    'CountryExpenditureBreakdownResource',
+    'CountrySummaryResource'
 ]
\ No newline at end of file
@@ -1,32 +1,31 @@
-from flask import request
-from flask_restful import Resource
-from flask import current_app
 import pandas as pd
 
 from api.reports.data import get_country_mapping
-from commons import parser
+from api.reports.datasets import datasets
+from commons.diagnostics import diagnostics
+from commons.resources import ReportResource
+from commons.timing import timing
 
 
-class CountryExpenditureBreakdownResource(Resource):
+class CountryExpenditureBreakdownResource(ReportResource):
     """
     國家旅遊消費結構分析 API
     分析總消費中，旅遊消費 vs 交通消費的佔比
     """
+    depends_on = ('expenditure',)
+    default_year = 2019
 
     def get(self, country_code):
         # 載入消費數據
-        path = current_app.config['BASE_DIR'] / 'data/UN_Tourism_inbound_expenditure_10_2025.csv'
-
         try:
-            df = pd.read_csv(path)
+            table = datasets.get('expenditure')
         except Exception as e:
             return {'error': f'無法讀取數據檔案: {str(e)}'}, 500
 
-        print("=" * 60)
-        print(f"DEBUG: CountryExpenditureBreakdownResource - {country_code}")
+        timing.mark('load')
 
         # 獲取參數
-        year = parser.parse(request.args.get('year'), cast=int, default=2019)
+        year = self.request_year()
 
         # 反向查找國家名稱
         country_mapping = get_country_mapping()
@@ -39,15 +38,11 @@ class CountryExpenditureBreakdownResource(Resource):
                 'country_code': country_code
             }, 404
 
-        print(f"國家: {country_name} ({country_code})")
-        print(f"年份: {year}")
-
-        # 篩選該國家和年份的數據
-        df_country = df[
-            (df['reporter_area_label'] == country_name) &
-            (df['partner_area_label'] == 'World') &
-            (df['year'] == year)
-            ].copy()
+        # 篩選該國家和年份的數據（每個指標用索引二分查找，不掃描整張表）
+        index = table.index
+        df_country = table.frame(
+            rows=index.rows([(indicator, 'World', year, country_name) for indicator in index.children()])
+        )
 
         if len(df_country) == 0:
             return {
@@ -57,14 +52,14 @@ class CountryExpenditureBreakdownResource(Resource):
                 'year': year
             }, 404
 
-        print(f"\n找到 {len(df_country)} 行數據")
+        timing.mark('filter')
 
         # 提取三種消費類型
         expenditure_data = {}
 
         for _, row in df_country.iterrows():
             indicator = row['indicator_code']
-            value = pd.to_numeric(row['value'], errors='coerce')
+            value = row['value']
 
             if pd.notna(value):
                 expenditure_data[indicator] = {
@@ -73,9 +68,14 @@ class CountryExpenditureBreakdownResource(Resource):
                     'unit': row.get('unit', 'million US dollars')
                 }
 
-        print(f"\n可用指標:")
-        for code, data in expenditure_data.items():
-            print(f"  {code}: ${data['value']:,.0f}M")
+        diagnostics.record(
+            'country_expenditure_breakdown.indicators',
+            country=country_name,
+            country_code=country_code,
+            year=year,
+            rows=len(df_country),
+            indicators=lambda: {code: data['value'] for code, data in expenditure_data.items()},
+        )
 
         # 判斷數據可用性
         has_total = 'INBD_EXPD_BPAY_TOTL_VSTR' in expenditure_data
@@ -140,6 +140,8 @@ class CountryExpenditureBreakdownResource(Resource):
                 }
             }, 404
 
+        timing.mark('breakdown')
+
         # 計算百分比
         total_calculated = sum(breakdown.values())
         percentages = {
@@ -180,13 +182,12 @@ class CountryExpenditureBreakdownResource(Resource):
                 'description': '其他未分類消費'
             })
 
-        print(f"\n✅ 消費結構分析:")
-        print(f"  計算方法: {calculation_method}")
-        print(f"  旅遊消費: ${breakdown['travel']:,.0f}M ({percentages['travel']:.1f}%)")
-        print(f"  國際交通: ${breakdown['transport']:,.0f}M ({percentages['transport']:.1f}%)")
-        if breakdown['other'] > 0:
-            print(f"  其他消費: ${breakdown['other']:,.0f}M ({percentages['other']:.1f}%)")
-        print("=" * 60)
+        diagnostics.record(
+            'country_expenditure_breakdown.breakdown',
+            calculation_method=calculation_method,
+            breakdown=breakdown,
+            percentages=percentages,
+        )
 
         return {
             'country': country_name,
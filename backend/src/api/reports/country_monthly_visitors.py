@@ -0,0 +1,226 @@
+import numpy as np
+from flask import request
+
+from api.reports.datasets import datasets
+from api.reports.monthly import MONTH_NAMES, monthly_sources
+from commons import parser
+from commons.diagnostics import diagnostics
+from commons.resources import ReportResource
+from commons.timing import timing
+
+
+class CountryMonthlyVisitorsResource(ReportResource):
+    """
+    國家每月遊客數量 API
+    返回指定國家、指定年份的每月遊客數據（數據來源見 monthly_sources）；
+    指定 years=2019,2020 時一次返回多個年份的 年份 × 月份 數據；
+    回應只依賴所請求國家的來源，其他來源無法讀取或被更新時不受影響
+    """
+
+    @classmethod
+    def country_codes(cls):
+        return list(monthly_sources.sources)
+
+    @classmethod
+    def country_datasets(cls, country_code):
+        source = monthly_sources.sources.get(country_code.upper())
+        return (source.dataset,) if source else ()
+
+    @property
+    def depends_on(self):
+        return self.country_datasets(request.view_args['country_code'])
+
+    def latest_year(self):
+        try:
+            source = monthly_sources.sources[request.view_args['country_code'].upper()]
+            return int(datasets.get(source.matrix).years.max())
+        except Exception:
+            return None
+
+    def request_years(self):
+        """
+        多年份查詢的年份（遞增、不重複），忽略無效的年份
+        """
+        years = (parser.parse(year, cast=int, default=None) for year in parser.csv()(request.args.get('years')))
+        return tuple(sorted({year for year in years if year is not None}))
+
+    def query_args(self):
+        years = self.request_years()
+        return {'years': years} if years else super().query_args()
+
+    def get(self, country_code):
+        country_code = country_code.upper()
+        source = monthly_sources.sources.get(country_code)
+
+        if source is None:
+            return {
+                'country_code': country_code,
+                'data': {'months': [], 'values': [], 'changes': []},
+                'debug': {
+                    'message': f'No monthly data for country {country_code}',
+                    'available_countries': self.country_codes()
+                }
+            }, 404
+
+        # 載入月度數據（所有來源已在載入時按年月加總為 年份 × 月份 矩陣）
+        try:
+            matrix = datasets.get(source.matrix)
+        except Exception as e:
+            return {'error': f'無法讀取數據檔案: {str(e)}'}, 500
+
+        timing.mark('load')
+
+        diagnostics.record(
+            'country_monthly_visitors.data',
+            country_code=country_code,
+            rows=lambda: len(datasets.get(source.dataset)),
+            years=lambda: [matrix.years.min(), matrix.years.max()],
+        )
+
+        if self.request_years():
+            return self.get_years(source, matrix, self.request_years())
+
+        # 獲取請求參數
+        year = self.request_year()
+
+        # 如果指定年份，只返回該年份數據
+        if year:
+            position = matrix.year(year)
+
+            if position < 0:
+                available_years = matrix.years.tolist()
+                return {
+                    'year': year,
+                    'data': {'months': [], 'values': [], 'changes': []},
+                    'stats': {'total_visitors': 0, 'avg_visitors': 0},
+                    'debug': {
+                        'message': f'No data for year {year}',
+                        'available_years': available_years
+                    }
+                }, 404
+        else:
+            # 如果沒有指定年份，返回最新一年的數據
+            position = len(matrix.years) - 1
+            year = int(matrix.years[position])
+
+        timing.mark('filter')
+
+        # 只保留有數據的月份（月份順序）
+        visitors = matrix.values[position]
+        months = np.flatnonzero(matrix.present[position] & ~np.isnan(visitors))
+
+        diagnostics.record(
+            'country_monthly_visitors.months',
+            country_code=country_code,
+            year=year,
+            months=lambda: [{'Month': month + 1, 'visitor': visitors[month]} for month in months],
+        )
+
+        if len(months) == 0:
+            return {
+                'year': year,
+                'data': {'months': [], 'values': [], 'changes': []},
+                'stats': {'total_visitors': 0, 'avg_visitors': 0},
+                'debug': {
+                    'message': f'No valid data for year {year}'
+                }
+            }, 404
+
+        values = visitors[months]
+        timing.mark('months')
+
+        # 計算統計數據
+        total_visitors = int(values.sum())
+        avg_visitors = int(values.mean())
+        max_month = months[values.argmax()]
+        min_month = months[values.argmin()]
+
+        # 同比變化率已在載入時以前一年的矩陣列計算（沒有前一年數據為 0）
+        changes = np.nan_to_num(matrix.changes[position, months]).round(1)
+
+        # 準備返回數據
+        data = {
+            'months': [MONTH_NAMES[month] for month in months],
+            'month_numbers': months + 1,
+            'values': values.astype(int),
+            'changes': changes
+        }
+
+        stats = {
+            'year': int(year),
+            'total_visitors': total_visitors,
+            'avg_visitors': avg_visitors,
+            'max_month': {
+                'month': MONTH_NAMES[max_month],
+                'month_number': int(max_month) + 1,
+                'value': int(visitors[max_month])
+            },
+            'min_month': {
+                'month': MONTH_NAMES[min_month],
+                'month_number': int(min_month) + 1,
+                'value': int(visitors[min_month])
+            },
+            'available_years': matrix.years.astype(int).tolist()
+        }
+
+        return {
+            'country': source.country,
+            'country_code': country_code,
+            'year': year,
+            'data': data,
+            'stats': stats
+        }
+
+    def get_years(self, source, matrix, years):
+        """
+        多個年份的每月遊客數與變化率（年份 × 月份，沒有數據的月份為 null）
+        """
+        positions = np.array([matrix.year(year) for year in years], dtype=np.intp)
+        positions = positions[positions >= 0]
+
+        if len(positions) == 0:
+            return {
+                'years': list(years),
+                'data': {'months': [], 'values': [], 'changes': []},
+                'debug': {
+                    'message': f'No data for years {list(years)}',
+                    'available_years': matrix.years.tolist()
+                }
+            }, 404
+
+        present = matrix.present[positions] & ~np.isnan(matrix.values[positions])
+        values = np.where(present, matrix.values[positions], np.nan)
+        changes = np.where(present, np.nan_to_num(matrix.changes[positions]).round(1), np.nan)
+        timing.mark('filter')
+
+        return {
+            'country': source.country,
+            'country_code': source.code,
+            'years': matrix.years[positions],
+            'data': {
+                'months': MONTH_NAMES,
+                'month_numbers': np.arange(1, 13),
+                'values': values,
+                'changes': changes,
+                'totals': np.nansum(values, axis=1)
+            },
+            'available_years': matrix.years.astype(int).tolist()
+        }
+
+
+class MonthlyVisitorsCountriesResource(ReportResource):
+    """
+    有月度遊客數據的國家 API
+    返回註冊的月度數據來源，前端只為這些國家請求 /country/<code>/monthly-visitors
+    """
+
+    def query_args(self):
+        return {}
+
+    def get(self):
+        return {
+            'countries': [
+                {'country_code': source.code, 'country': source.country}
+                for source in monthly_sources.sources.values()
+            ]
+        }
@@ -0,0 +1,92 @@
+from api.reports.data import get_country_mapping
+from api.reports.datasets import datasets
+from api.reports.world_map import RANK_METRICS, rank_dataset
+from commons.diagnostics import diagnostics
+from commons.resources import ReportResource
+from commons.timing import timing
+
+
+# 國家代碼 → 國家名稱（反向的國家代碼映射，模組載入時建立一次）
+COUNTRY_NAMES = {code: name for name, code in get_country_mapping().items()}
+
+
+class CountrySummaryResource(ReportResource):
+    """
+    國家摘要 API
+    返回指定國家與年份的遊客流量、總消費、平均消費與擁擠度，以及在各世界地圖中的名次；
+    直接查詢預先計算的排名陣列，不重新計算世界地圖
+    """
+    depends_on = ('arrivals', 'expenditure')
+    default_year = 2019
+
+    def get(self, country_code):
+        country_code = country_code.upper()
+
+        # 載入預先計算的各指標排名；指標的數據無法讀取時該指標為空，不影響其他指標
+        ranks, errors = {}, {}
+
+        for name in RANK_METRICS:
+            try:
+                ranks[name] = datasets.get(rank_dataset(name))
+            except Exception as e:
+                errors[name] = str(e)
+
+        if not ranks:
+            return {'error': f'無法讀取數據檔案: {errors[RANK_METRICS[0]]}'}, 500
+
+        timing.mark('load')
+
+        # 獲取參數
+        year = self.request_year()
+
+        # 反向查找國家名稱
+        country_name = COUNTRY_NAMES.get(country_code)
+
+        if not country_name:
+            return {
+                'error': f'Country code {country_code} not found',
+                'country_code': country_code
+            }, 404
+
+        metrics = {}
+
+        for name in RANK_METRICS:
+            metric = ranks.get(name)
+            row = metric.year(year) if metric is not None else -1
+            column = metric.country(country_code) if metric is not None else -1
+            rank = int(metric.ranks[row, column]) if row >= 0 and column >= 0 else 0
+            metrics[name] = {
+                'value': float(metric.values[row, column]) if rank else None,
+                'rank': rank or None,
+                'total_countries': int(metric.ranked[row]) if row >= 0 else 0
+            }
+
+        timing.mark('lookup')
+
+        diagnostics.record(
+            'country_summary.ranks',
+            country_code=country_code,
+            year=year,
+            ranks=lambda: {name: metric['rank'] for name, metric in metrics.items()},
+        )
+
+        if not any(metric['rank'] for metric in metrics.values()):
+            return {
+                'error': f'No data for {country_name} in {year}',
+                'country': country_name,
+                'country_code': country_code,
+                'year': year
+            }, 404
+
+        result = {
+            'country': country_name,
+            'country_code': country_code,
+            'year': int(year),
+            'metrics': metrics
+        }
+
+        if errors:
+            # 無法讀取數據的指標及原因
+            result['unavailable'] = errors
+
+        return result
@@ -1,5 +1,5 @@
-import pandas as pd
-from flask import current_app
+from api.reports.datasets import datasets
+from commons.diagnostics import diagnostics
 
 
 def get_tourism_data():
@@ -7,27 +7,23 @@ def get_tourism_data():
     Load UN Tourism dataset and prepare for reports.
     載入聯合國旅遊數據集
     """
-    path = current_app.config['BASE_DIR'] / 'data/UN_Tourism_inbound_arrivals_by_region_10_2025.csv'
-
-    # 載入數據集
-    df = pd.read_csv(path)
-
-    print("=" * 60)
-    print("DEBUG: 數據載入")
-    print(f"總行數: {len(df)}")
-    print(f"欄位: {df.columns.tolist()}")
-    print(f"\n前 5 行:")
-    print(df.head())
-    print(f"\nindicator_code 唯一值:")
-    print(df['indicator_code'].unique())
-    print(f"\n年份範圍: {df['year'].min()} - {df['year'].max()}")
-    print("=" * 60)
+    # 載入數據集（共用，已轉換 value 為數值）
+    table = datasets.get('arrivals')
+
+    diagnostics.record(
+        'tourism_data.load',
+        rows=len(table),
+        columns=table.columns,
+        head=lambda: table.frame(rows=slice(0, 5)).to_dict('records'),
+        indicator_codes=lambda: table.unique('indicator_code'),
+        years=lambda: [table['year'].min(), table['year'].max()],
+    )
 
     # 只保留需要的欄位
-    df = df[['reporter_area_code', 'reporter_area_label', 'year', 'value', 'indicator_code']]
+    df = table.frame(columns=['reporter_area_code', 'reporter_area_label', 'year', 'value', 'indicator_code'])
 
     # 轉換數值欄位（千人轉換為人）
-    df['value'] = pd.to_numeric(df['value'], errors='coerce') * 1000
+    df['value'] = df['value'] * 1000
 
     # 刪除無效值
     df = df.dropna()
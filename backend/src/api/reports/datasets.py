@@ -0,0 +1,171 @@
+import re
+
+import numpy as np
+import pandas as pd
+
+from commons.datasets import DatasetRegistry
+
+
+# 報表實際使用的欄位
+UN_TOURISM_COLUMNS = [
+    'indicator_code', 'indicator_label', 'reporter_area_code', 'reporter_area_label',
+    'partner_area_label', 'year', 'value', 'unit',
+]
+
+# 完全由指標或國家決定的欄位，存放於維度表而非每一行
+UN_TOURISM_ATTRIBUTES = {
+    'indicator_label': 'indicator_code',
+    'unit': 'indicator_code',
+    'reporter_area_code': 'reporter_area_label',
+}
+
+# 事實表的排序與索引鍵：任何 (指標, 夥伴地區, 年份[, 國家]) 都對應連續的行
+UN_TOURISM_INDEX = ('indicator_code', 'partner_area_label', 'year', 'reporter_area_label')
+
+# 遊客人次指標（按優先級）
+ARRIVALS_INDICATORS = [
+    'INBD_TRIP_AREA_TOTL_TOUR',  # 1. 總入境遊客（最優先）
+    'INBD_TRIP_AREA_TOUR_ABRD',  # 2. 入境遊客（按地區）
+    'INBD_TRIP_REGN_TOUR',       # 3. 區域入境遊客
+]
+
+# 消費指標（按優先級）
+EXPENDITURE_INDICATORS = [
+    'INBD_EXPD_BPAY_TOTL_VSTR',  # 總消費
+    'INBD_EXPD_BPAY_TRVL_VSTR',  # 旅遊消費 ✅ 中國用這個
+    'INBD_EXPD_BPAY_PSTR_VSTR',  # 客運交通消費
+]
+
+# 韓國入境遊客的分類欄位
+KOREA_AGE_GROUPS = ['age0-20', 'age21-30', 'age31-40', 'age41-50', 'age51-60', 'age61']
+KOREA_PURPOSES = ['tourism', 'business', 'official affairs', 'studying', 'others']
+
+
+def load_un_tourism(path):
+    """
+    載入聯合國旅遊數據集，只讀取使用的欄位，並將 value 轉為數值
+    """
+    df = pd.read_csv(path, usecols=UN_TOURISM_COLUMNS)
+    df['year'] = df['year'].astype(np.int16)
+    df['value'] = pd.to_numeric(df['value'], errors='coerce')
+    return df[UN_TOURISM_COLUMNS]
+
+
+def indicator_counts(table, year):
+    """
+    各指標在指定年份的數據行數（透過索引計算，不掃描整張表）
+    """
+    index = table.index
+    counts = {}
+
+    for indicator in index.children():
+        count = sum(index.size(indicator, partner, year) for partner in index.children(indicator))
+        if count:
+            counts[indicator] = count
+
+    return counts
+
+
+# JTM 的 Monthly 欄：年份 + 月份 (如 "1997　Jan．")，或只有月份 (如 "Feb．")
+MONTHLY_YEAR_MONTH = r'(\d{4}).*?([A-Za-z]{3})'
+MONTHLY_MONTH = r'([A-Za-z]{3})'
+
+# 韓國數據的日期：YYYY-M，或逐日數據的 YYYY-M-D（忽略日）
+KOREA_DATE = r'^(\d{4})-(\d{1,2})'
+
+
+def parse_monthly(monthly_str):
+    """
+    解析各種格式：
+    - '1997　Jan．' (年份+月份在同一格)
+    - 'Feb．' (只有月份，沿用前一年)
+    """
+    monthly_str = str(monthly_str).strip()
+
+    # 格式 1: 年份 + 月份 (如 "1997　Jan．")
+    match_year_month = re.search(MONTHLY_YEAR_MONTH, monthly_str)
+    if match_year_month:
+        year = int(match_year_month.group(1))
+        month = match_year_month.group(2)
+        return year, month
+
+    # 格式 2: 只有月份 (如 "Feb．")
+    match_month = re.search(MONTHLY_MONTH, monthly_str)
+    if match_month:
+        month = match_month.group(1)
+        return None, month  # 年份稍後填充
+
+    return None, None
+
+
+def load_japan_monthly(path):
+    """
+    載入日本 JTM 月度數據，解析年月並清理數值，返回 Year, Month, visitor 欄
+    """
+    df = pd.read_csv(path)
+
+    # 第一次解析：提取年份和月份（與 parse_monthly 相同的規則，整欄一次處理；空白格如 str() 為 'nan'）
+    monthly = df['Monthly '].map(str).str.strip()
+    year_month = monthly.str.extract(MONTHLY_YEAR_MONTH)
+    df['Year'] = pd.to_numeric(year_month[0])
+    df['Month'] = year_month[1].fillna(monthly.str.extract(MONTHLY_MONTH)[0])
+
+    # 填充缺失的年份（使用前一行的年份）
+    df['Year'] = df['Year'].ffill()
+
+    # 移除解析失敗的行
+    df = df.dropna(subset=['Year', 'Month'])
+    df['Year'] = df['Year'].astype(np.int16)
+
+    # 清理數據：移除逗號和引號，轉換為數字
+    df['Grand Total'] = df['Grand Total'].astype(str).str.replace('"', '', regex=False)
+    df['Grand Total'] = df['Grand Total'].str.replace(',', '', regex=False).str.strip()
+    df['Grand Total'] = pd.to_numeric(df['Grand Total'], errors='coerce')
+
+    # 標準化月份名稱（移除句點）
+    df['Month'] = df['Month'].str.replace('.', '', regex=False).str.replace('．', '', regex=False).str.strip()
+
+    month_order = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun',
+                   'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
+    df['MonthNum'] = df['Month'].map({m: i + 1 for i, m in enumerate(month_order)})
+
+    # 月度來源的統一欄位（見 api.reports.monthly），移除無法識別的月份
+    df = df.dropna(subset=['MonthNum'])
+    return pd.DataFrame({
+        'Year': df['Year'],
+        'Month': df['MonthNum'].astype(np.int8),
+        'visitor': df['Grand Total'],
+    }).reset_index(drop=True)
+
+
+def load_korea_monthly(path):
+    """
+    載入韓國月度數據，解析 date 列（格式：YYYY-M 或逐日的 YYYY-M-D），返回 Year, Month, visitor, nation 與各分類欄
+    """
+    df = pd.read_csv(path)
+
+    year_month = df['date'].astype(str).str.strip().str.extract(KOREA_DATE)
+    df['Year'] = pd.to_numeric(year_month[0], errors='coerce')
+    df['Month'] = pd.to_numeric(year_month[1], errors='coerce')
+
+    # 移除解析失敗的行
+    df = df.dropna(subset=['Year', 'Month', 'visitor'])
+    df['Year'] = df['Year'].astype(np.int16)
+    df['Month'] = df['Month'].astype(np.int8)
+    df['visitor'] = pd.to_numeric(df['visitor'], errors='coerce')
+
+    df = df.drop(columns=['date'])
+    return df.reset_index(drop=True)
+
+
+datasets = DatasetRegistry()
+
+datasets.register(
+    'arrivals', 'UN_Tourism_inbound_arrivals_by_region_10_2025.csv', load_un_tourism,
+    attributes=UN_TOURISM_ATTRIBUTES, index=UN_TOURISM_INDEX, version=2
+)
+datasets.register(
+    'expenditure', 'UN_Tourism_inbound_expenditure_10_2025.csv', load_un_tourism,
+    attributes=UN_TOURISM_ATTRIBUTES, index=UN_TOURISM_INDEX, version=2
+)
+datasets.register('korea_purpose', 'country_data/Enter_korea_by_purpose(KOREA).csv', load_korea_monthly, version=3)
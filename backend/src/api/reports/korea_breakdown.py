@@ -0,0 +1,103 @@
+from flask import request
+
+from api.reports.datasets import datasets
+from commons import parser
+from commons.diagnostics import diagnostics
+from commons.resources import ReportResource
+from commons.timing import timing
+
+
+# 分類維度與對應的預先加總數據
+BREAKDOWN_DIMENSIONS = {
+    'purpose': 'korea_purpose_breakdown',
+    'age': 'korea_age_breakdown',
+}
+
+
+class KoreaBreakdownResource(ReportResource):
+    """
+    韓國入境遊客分類 API
+    返回指定年份、月份與國家的遊客按目的（dimension=purpose）或年齡（dimension=age）的分佈；
+    未指定月份或國家時為全年或所有國家的總計，year=all 為所有年份的總計
+    """
+    depends_on = ('korea_monthly', 'korea_purpose')
+
+    def latest_year(self):
+        try:
+            return int(datasets.get('korea_monthly')['Year'].max())
+        except Exception:
+            return None
+
+    def query_args(self):
+        year = request.args.get('year')
+        return {
+            'dimension': request.args.get('dimension', 'purpose'),
+            'year': 'all' if year == 'all' else self.request_year(),
+            'month': parser.parse(request.args.get('month'), cast=int, default=None),
+            'nation': request.args.get('nation') or None,
+        }
+
+    def get(self):
+        args = self.query_args()
+        dimension = args['dimension']
+
+        if dimension not in BREAKDOWN_DIMENSIONS:
+            return {
+                'error': f'Unknown dimension {dimension}',
+                'available_dimensions': list(BREAKDOWN_DIMENSIONS)
+            }, 400
+
+        # 載入預先加總的分類數據
+        try:
+            breakdown = datasets.get(BREAKDOWN_DIMENSIONS[dimension])
+        except Exception as e:
+            return {'error': f'無法讀取數據檔案: {str(e)}'}, 500
+
+        timing.mark('load')
+
+        year = None if args['year'] == 'all' else args['year']
+        cell = breakdown.year(year), breakdown.month(args['month']), breakdown.nation(args['nation'])
+        result = {
+            'country': 'South Korea',
+            'country_code': 'KOR',
+            'dimension': dimension,
+            'year': args['year'],
+            'month': args['month'],
+            'nation': args['nation'],
+        }
+
+        if min(cell) < 0 or breakdown.rows[cell] == 0:
+            return {
+                **result,
+                'data': {'buckets': [], 'values': [], 'shares': []},
+                'debug': {
+                    'message': 'No data for this year, month and nation',
+                    'available_years': breakdown.years.tolist()
+                }
+            }, 404
+
+        values = breakdown.values[cell]
+        total = values.sum()
+        timing.mark('lookup')
+
+        diagnostics.record(
+            'korea_breakdown.cell',
+            dimension=dimension,
+            cell=list(cell),
+            rows=breakdown.rows[cell],
+            total=total,
+        )
+
+        return {
+            **result,
+            'data': {
+                'buckets': breakdown.buckets,
+                'values': values.astype(int),
+                'shares': (values / total * 100).round(2) if total > 0 else values * 0
+            },
+            'stats': {
+                'total_visitors': int(total),
+                'max_bucket': breakdown.buckets[values.argmax()]
+            },
+            'available_years': breakdown.years.tolist()
+        }
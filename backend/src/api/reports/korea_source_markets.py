@@ -0,0 +1,90 @@
+from flask import request
+
+from api.reports.datasets import datasets
+from commons import parser
+from commons.diagnostics import diagnostics
+from commons.resources import ReportResource
+from commons.timing import timing
+
+
+class KoreaSourceMarketsResource(ReportResource):
+    """
+    韓國主要客源國 API
+    返回指定年份（與月份）遊客數最多的前 k 個國家，以及其佔比與同比增長率；
+    排名在載入時按期間預先排序
+    """
+    depends_on = ('korea_monthly',)
+    default_k = 10
+
+    def latest_year(self):
+        try:
+            return int(datasets.get('korea_source_markets').years.max())
+        except Exception:
+            return None
+
+    def query_args(self):
+        k = parser.parse(request.args.get('k'), cast=int, default=self.default_k)
+        return {
+            'year': self.request_year(),
+            'month': parser.parse(request.args.get('month'), cast=int, default=None),
+            'k': k if k > 0 else self.default_k,
+        }
+
+    def get(self):
+        # 載入預先排序的客源國數據
+        try:
+            markets = datasets.get('korea_source_markets')
+        except Exception as e:
+            return {'error': f'無法讀取數據檔案: {str(e)}'}, 500
+
+        timing.mark('load')
+
+        args = self.query_args()
+        year, month, k = args['year'], args['month'], args['k']
+        period = markets.period(year, month)
+
+        if period is None:
+            return {
+                'year': year,
+                'month': month,
+                'data': {'nations': [], 'values': [], 'shares': [], 'growth': []},
+                'debug': {
+                    'message': f'No data for {year}' + (f'-{month}' if month else ''),
+                    'available_years': markets.years.tolist()
+                }
+            }, 404
+
+        # 取出預先排好的前 k 名
+        top = markets.top(period, k)
+        values = markets.visitors[period][top]
+        total = markets.totals[period]
+        timing.mark('rank')
+
+        diagnostics.record(
+            'korea_source_markets.period',
+            year=year,
+            month=month,
+            nations=markets.counts[period],
+            top=lambda: dict(zip(markets.nations[top].tolist(), values.tolist())),
+        )
+
+        return {
+            'country': 'South Korea',
+            'country_code': 'KOR',
+            'year': year,
+            'month': month,
+            'k': k,
+            'data': {
+                'nations': markets.nations[top],
+                'ranks': list(range(1, len(top) + 1)),
+                'values': values.astype(int),
+                'shares': (values / total * 100).round(2),
+                'growth': markets.growth[period][top].round(1)
+            },
+            'stats': {
+                'total_visitors': int(total),
+                'total_nations': int(markets.counts[period]),
+                'top_share': round(float(values.sum() / total * 100), 2)
+            },
+            'available_years': markets.years.tolist()
+        }
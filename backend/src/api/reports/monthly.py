@@ -0,0 +1,302 @@
+"""
+月度遊客的 年份 × 月份 矩陣與分類加總
+
+各國的月度數據來源註冊於 monthly_sources，載入時展開為 年份 × 12 個月 的陣列（缺值為 NaN），
+韓國的年齡與目的分類則加總為含各軸總計的陣列；月度 API 只需取出一列，不需在每次請求時篩選與分組。
+"""
+from functools import partial
+
+import numpy as np
+import pandas as pd
+
+from api.reports.datasets import KOREA_AGE_GROUPS, KOREA_PURPOSES, datasets, load_japan_monthly, load_korea_monthly
+
+
+MONTH_NAMES = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
+
+# 月度來源統一的欄位：必要的數值欄與可選的文字欄
+MONTHLY_COLUMNS = ['Year', 'Month', 'visitor']
+MONTHLY_LABELS = ['nation', 'category']
+
+
+class MonthlyMatrix:
+    """
+    - years：有數據的年份（遞增）
+    - values：年份 × 月份 的遊客數
+    - changes：年份 × 月份 的同比變化率（%），沒有則為 NaN
+    - present：該年該月是否有數據（即使數值為空）
+    """
+
+    def __init__(self, years, values, changes, present):
+        self.years = np.asarray(years)
+        self.values = values
+        self.changes = changes
+        self.present = present
+        self._years = {year: i for i, year in enumerate(self.years.tolist())}
+
+        for array in (self.years, self.values, self.changes, self.present):
+            array.flags.writeable = False
+
+    def year(self, year):
+        """
+        年份在年份軸上的位置，沒有該年份則為 -1
+        """
+        return self._years.get(year, -1)
+
+
+def year_over_year(years, values, present):
+    """
+    各月相對前一年同月的變化率（%）：整個矩陣向下平移一年後相除；
+    前一年不在年份軸上、該月沒有數據或數值不大於 0 時為 NaN
+    """
+    previous = np.full(values.shape, np.nan)
+    consecutive = np.flatnonzero(np.diff(years) == 1) + 1
+    previous[consecutive] = np.where(present[consecutive - 1], values[consecutive - 1], np.nan)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        changes = (values - previous) / previous * 100
+
+    return np.where(previous > 0, changes, np.nan)
+
+
+def monthly_matrix(years, months, visitors):
+    """
+    按年月加總遊客數（同一年月可有多行，例如按國家或按日），並由矩陣計算同比變化率
+    """
+    months = months.astype(np.intp) - 1
+    valid = (months >= 0) & (months < 12)
+    axis = np.unique(years)
+    cells = np.searchsorted(axis, years[valid]) * 12 + months[valid]
+    size = len(axis) * 12
+
+    visitors = visitors[valid]
+    counted = ~np.isnan(visitors)
+    values = np.bincount(cells[counted], weights=visitors[counted], minlength=size)
+    values[np.bincount(cells[counted], minlength=size) == 0] = np.nan
+    values = values.reshape(-1, 12)
+    present = (np.bincount(cells, minlength=size) > 0).reshape(-1, 12)
+
+    return MonthlyMatrix(axis, values, year_over_year(axis, values, present), present)
+
+
+def monthly_frame(code, table):
+    """
+    將來源的數據投影為統一的月度欄位：Year (int16)、Month (int8)、visitor (float64)，
+    以及來源有提供的 nation、category（文字）；缺少必要欄位時拋出 ValueError，其他欄位捨棄
+    """
+    missing = [column for column in MONTHLY_COLUMNS if column not in table]
+
+    if missing:
+        raise ValueError(f'Monthly source {code} lacks columns: {", ".join(missing)}')
+
+    frame = pd.DataFrame({
+        'country': code,
+        'Year': table['Year'].astype(np.int16),
+        'Month': table['Month'].astype(np.int8),
+        'visitor': table['visitor'].astype(np.float64),
+    })
+
+    for column in MONTHLY_LABELS:
+        frame[column] = table.decode(column) if column in table else None
+
+    return frame
+
+
+def source_matrix(code, table):
+    """
+    來源投影為統一欄位（見 monthly_frame）後的 年份 × 月份 矩陣
+    """
+    frame = monthly_frame(code, table)
+    return monthly_matrix(frame['Year'].to_numpy(), frame['Month'].to_numpy(), frame['visitor'].to_numpy())
+
+
+class MonthlySource:
+    """
+    - dataset：來源數據的名稱
+    - matrix：該來源 年份 × 月份 矩陣（MonthlyMatrix）的衍生數據名稱
+    """
+    __slots__ = ('code', 'country', 'dataset', 'matrix')
+
+    def __init__(self, code, country, dataset):
+        self.code = code
+        self.country = country
+        self.dataset = dataset
+        self.matrix = f'monthly_visitors_{code}'
+
+
+class MonthlySources:
+    """
+    各國月度遊客數據來源
+
+    每個來源只需宣告國家、數據檔案與解析函數；解析函數返回每行一個
+    (Year, Month, visitor[, nation, category]) 的表格（見 MONTHLY_COLUMNS）。每個來源載入後投影為
+    統一欄位並整理為各自的 年份 × 月份 矩陣（source.matrix），由 /country/<code>/monthly-visitors 提供；
+    各來源獨立載入與更新，一個來源無法讀取或被更新時不影響其他國家。
+    解析函數的其他欄位只供同一數據的其他報表使用（如韓國的年齡與目的分類）。
+    """
+
+    def __init__(self):
+        self.sources = {}
+
+    def register(self, code, country, name, path, loader, version=1):
+        datasets.register(name, path, loader, version=version)
+        source = self.sources[code] = MonthlySource(code, country, name)
+        datasets.derive(source.matrix, [name], partial(source_matrix, code))
+
+
+class Breakdown:
+    """
+    按 年份 × 月份 × 國家 × 類別 預先加總的遊客數，每個軸的最後一格為該軸的總計，
+    任何 (年份 | 全部, 月份 | 全部, 國家 | 全部) 的組合都只需取出一列
+
+    - years / nations：各軸的標籤（不含總計）
+    - values：(年份 + 1) × 13 × (國家 + 1) × 類別 的遊客數
+    - rows：同形狀（不含類別軸）的數據行數，0 表示沒有數據
+    """
+
+    def __init__(self, table, buckets):
+        self.buckets = list(buckets)
+        self.years = table.unique('Year')
+        self.nations = table.unique('nation')
+
+        # 國家代碼 → 國家軸位置
+        codes = table['nation']
+        nation_positions = np.searchsorted(self.nations, table.categories('nation'))
+        months = table['Month'].astype(np.intp) - 1
+        valid = (codes >= 0) & (months >= 0) & (months < 12)
+
+        n_years, n_nations = len(self.years), len(self.nations)
+        cells = (
+            np.searchsorted(self.years, table['Year'][valid]) * 12 + months[valid]
+        ) * n_nations + nation_positions[codes[valid]]
+        size = n_years * 12 * n_nations
+
+        base = np.stack([
+            np.bincount(cells, weights=np.nan_to_num(table[bucket][valid].astype(float)), minlength=size)
+            for bucket in self.buckets
+        ], axis=-1).reshape(n_years, 12, n_nations, len(self.buckets))
+        counts = np.bincount(cells, minlength=size).reshape(n_years, 12, n_nations)
+
+        self.values = _rollup(base, n_years, n_nations)
+        self.rows = _rollup(counts, n_years, n_nations)
+        self._years = {year: i for i, year in enumerate(self.years.tolist())}
+        self._nations = {nation: i for i, nation in enumerate(self.nations.tolist())}
+
+        for array in (self.years, self.nations, self.values, self.rows):
+            array.flags.writeable = False
+
+    def year(self, year):
+        """
+        年份的位置，None 為所有年份的總計，沒有該年份則為 -1
+        """
+        return len(self.years) if year is None else self._years.get(year, -1)
+
+    def month(self, month):
+        """
+        月份（1-12）的位置，None 為全年的總計，無效月份為 -1
+        """
+        return 12 if month is None else month - 1 if 1 <= month <= 12 else -1
+
+    def nation(self, nation):
+        """
+        國家的位置，None 為所有國家的總計，沒有該國家則為 -1
+        """
+        return len(self.nations) if nation is None else self._nations.get(nation, -1)
+
+
+def _rollup(base, n_years, n_nations):
+    """
+    在 年份、月份、國家 三個軸的最後加上總計（依序加總，總計的總計也包含在內）
+    """
+    rolled = np.zeros((n_years + 1, 13, n_nations + 1) + base.shape[3:], dtype=base.dtype)
+    rolled[:n_years, :12, :n_nations] = base
+    rolled[:n_years, :12, n_nations] = base.sum(axis=2)
+    rolled[:n_years, 12] = rolled[:n_years, :12].sum(axis=1)
+    rolled[n_years] = rolled[:n_years].sum(axis=0)
+    return rolled
+
+
+class SourceMarkets:
+    """
+    韓國各客源國每期的遊客數與排名（期間為 年份 × 月份，月份軸最後一格為全年）
+
+    - years / nations：各軸的標籤
+    - visitors：年份 × 13 × 國家 的遊客數
+    - growth：同形狀的同比增長率（%），由各數據行的 growth 還原前一年遊客數後加總計算
+    - order：每期按遊客數由大到小的國家位置，載入時排序一次；counts 為每期有數據的國家數
+    """
+
+    def __init__(self, table):
+        self.years = table.unique('Year')
+        self.nations = table.unique('nation')
+
+        codes = table['nation']
+        nation_positions = np.searchsorted(self.nations, table.categories('nation'))
+        months = table['Month'].astype(np.intp) - 1
+        valid = (codes >= 0) & (months >= 0) & (months < 12)
+
+        n_years, n_nations = len(self.years), len(self.nations)
+        year_positions = np.searchsorted(self.years, table['Year'][valid])
+        nation_positions = nation_positions[codes[valid]]
+        months = months[valid]
+        visitors = np.nan_to_num(table['visitor'][valid].astype(float))
+
+        # 有 growth 的數據行：前一年遊客數 = 遊客數 ÷ (1 + growth%)
+        growth = table['growth'][valid].astype(float) if 'growth' in table else np.full(len(visitors), np.nan)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            previous = visitors / (1 + growth / 100)
+        comparable = np.isfinite(previous) & (previous > 0)
+
+        def total(weights, rows=slice(None)):
+            # 按 (年份, 月份, 國家) 加總，並加上全年的總計
+            cells = (year_positions[rows] * 13 + months[rows]) * n_nations + nation_positions[rows]
+            sums = np.bincount(cells, weights=weights, minlength=n_years * 13 * n_nations)
+            sums = sums.reshape(n_years, 13, n_nations)
+            sums[:, 12] = sums[:, :12].sum(axis=1)
+            return sums
+
+        self.visitors = total(visitors)
+        rows = total(np.ones(len(visitors))) > 0
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            self.growth = (total(visitors[comparable], comparable) / total(previous[comparable], comparable) - 1) * 100
+
+        # 每期排序一次（數值相同時按國家名稱），沒有數據的國家排在最後
+        self.order = np.argsort(np.where(rows, -self.visitors, np.inf), axis=-1, kind='stable').astype(np.int32)
+        self.counts = rows.sum(axis=-1)
+        self.totals = self.visitors.sum(axis=-1)
+        self._years = {year: i for i, year in enumerate(self.years.tolist())}
+
+        for array in (self.years, self.nations, self.visitors, self.growth, self.order, self.counts, self.totals):
+            array.flags.writeable = False
+
+    def period(self, year, month=None):
+        """
+        (年份, 月份) 的位置，月份為 None 時為全年；沒有該期間則為 None
+        """
+        position = self._years.get(year, -1)
+
+        if position < 0 or (month is not None and not 1 <= month <= 12):
+            return None
+
+        period = position, 12 if month is None else month - 1
+        return period if self.counts[period] > 0 else None
+
+    def top(self, period, k):
+        """
+        該期間遊客數最多的前 k 個國家位置
+        """
+        return self.order[period][:min(k, self.counts[period])]
+
+
+monthly_sources = MonthlySources()
+monthly_sources.register(
+    'JPN', 'Japan', 'japan_monthly', 'country_data/JTM_inbound_20251106eng(JAPAN).csv', load_japan_monthly, version=5
+)
+monthly_sources.register(
+    'KOR', 'South Korea', 'korea_monthly', 'country_data/Enter_korea_by_age(KOREA).csv', load_korea_monthly, version=3
+)
+
+datasets.derive('korea_age_breakdown', ['korea_monthly'], partial(Breakdown, buckets=KOREA_AGE_GROUPS))
+datasets.derive('korea_purpose_breakdown', ['korea_purpose'], partial(Breakdown, buckets=KOREA_PURPOSES))
+datasets.derive('korea_source_markets', ['korea_monthly'], SourceMarkets)
@@ -0,0 +1,307 @@
+"""
+世界地圖指標的稠密陣列
+
+UN 事實表的 World 數據在載入時展開為 國家 × 年份 × 指標 的陣列（缺值為 NaN），
+並預先完成指標優先級的選擇；世界地圖 API 只需取出一欄並做向量運算。
+"""
+from functools import partial
+
+import numpy as np
+
+from api.reports.data import get_country_mapping
+from api.reports.datasets import ARRIVALS_INDICATORS, EXPENDITURE_INDICATORS, datasets
+from commons.cube import Cube
+
+
+def first_valid(values):
+    """
+    沿最後一軸取第一個非 NaN 的值及其位置（沒有則為 NaN 與 -1）
+    """
+    valid = ~np.isnan(values)
+    positions = valid.argmax(axis=-1)
+    chosen = np.take_along_axis(values, positions[..., np.newaxis], axis=-1)[..., 0]
+    return chosen, np.where(valid.any(axis=-1), positions, -1)
+
+
+def descending(values):
+    """
+    依數值由大到小排序的位置，與 DataFrame.sort_values(ascending=False) 的順序相同
+    （包括數值相同的國家）
+    """
+    positions = np.arange(len(values))[::-1]
+    return positions[values[::-1].argsort(kind='quicksort')][::-1]
+
+
+def rank_of(iso3, code, **columns):
+    """
+    排序後國家 `code` 的名次（從 1 開始）與其在各欄的數值；不在結果中則為 None
+    （僅供診斷紀錄使用）
+    """
+    positions = np.flatnonzero(iso3 == code)
+
+    if len(positions) == 0:
+        return None
+
+    position = positions[0]
+    return {'rank': int(position) + 1, **{name: values[position] for name, values in columns.items()}}
+
+
+def top(iso3, countries, n=10, **columns):
+    """
+    排序後前 `n` 個國家與其在各欄的數值（僅供診斷紀錄使用）
+    """
+    return [
+        {'iso3': iso3[i], 'country': countries[i], **{name: values[i] for name, values in columns.items()}}
+        for i in range(min(n, len(iso3)))
+    ]
+
+
+class WorldMetric:
+    """
+    一張 UN 事實表中優先級指標的 World 數據
+
+    - cube：國家 × 年份 × 指標 的原始數值
+    - values / indicators_used：每個國家各自選擇優先級最高且有數值的指標
+    - year_indicators / year_values：每年選擇優先級最高且有任何數據的單一指標，所有國家共用
+    - present：國家在該年是否有任何優先級指標的 World 數據（即使數值為空）
+    """
+
+    def __init__(self, table, indicators):
+        index = table.index
+        self.indicators = list(indicators)
+        self.cube = Cube.from_table(
+            table,
+            index.rows([(indicator, 'World') for indicator in self.indicators]),
+            axes={
+                'reporter_area_label': None,
+                'year': index.distinct('year'),
+                'indicator_code': self.indicators,
+            }
+        )
+
+        self.countries = self.cube.labels('reporter_area_label')
+        self.years = self.cube.labels('year')
+
+        country_mapping = get_country_mapping()
+        self.iso3 = np.array([country_mapping.get(country, '') for country in self.countries.tolist()], dtype=object)
+        self.mapped = self.iso3 != ''
+
+        self.present = self.cube.present.any(axis=2)
+        self.values, self.indicators_used = first_valid(self.cube.values)
+
+        year_present = self.cube.present.any(axis=0)
+        self.year_indicators = np.where(year_present.any(axis=1), year_present.argmax(axis=1), -1)
+        self.year_values = np.full(self.values.shape, np.nan)
+
+        for position, indicator in enumerate(self.year_indicators):
+            if indicator >= 0:
+                self.year_values[:, position] = self.cube.values[:, position, indicator]
+
+        for array in (self.iso3, self.mapped, self.present, self.values, self.indicators_used,
+                      self.year_indicators, self.year_values):
+            array.flags.writeable = False
+
+    def year(self, year):
+        """
+        年份在年份軸上的位置，沒有該年份則為 -1
+        """
+        return self.cube.position('year', year)
+
+    def column(self, array, year):
+        """
+        取出某年的一欄（國家順序），沒有該年份則全為缺值
+        """
+        position = self.year(year)
+
+        if position < 0:
+            return np.full(len(self.countries), np.nan if array.dtype.kind == 'f' else 0, dtype=array.dtype)
+
+        return array[:, position]
+
+
+class AvgSpending:
+    """
+    平均每人次消費：兩份數據共有的國家與年份上，消費額 ÷ 遊客人次 × 1000
+    """
+
+    def __init__(self, arrivals, expenditure):
+        self.arrivals = arrivals
+        self.expenditure = expenditure
+
+        self.countries, tourist_rows, expenditure_rows = np.intersect1d(
+            arrivals.countries, expenditure.countries, assume_unique=True, return_indices=True
+        )
+        self.years, tourist_columns, expenditure_columns = np.intersect1d(
+            arrivals.years, expenditure.years, assume_unique=True, return_indices=True
+        )
+        self.iso3 = arrivals.iso3[tourist_rows]
+        self.mapped = arrivals.mapped[tourist_rows]
+
+        # 遊客（千人）與消費（百萬美元）
+        self.tourists = arrivals.values[np.ix_(tourist_rows, tourist_columns)]
+        self.expenditures = expenditure.values[np.ix_(expenditure_rows, expenditure_columns)]
+
+        # 公式：(消費額百萬美元 × 1,000,000) ÷ (遊客千人 × 1,000) = 消費額 ÷ 遊客千人 × 1,000
+        with np.errstate(divide='ignore', invalid='ignore'):
+            self.values = self.expenditures / self.tourists * 1000
+
+        self._years = {year: i for i, year in enumerate(self.years.tolist())}
+
+        for array in (self.iso3, self.mapped, self.tourists, self.expenditures, self.values):
+            array.flags.writeable = False
+
+    def column(self, array, year):
+        position = self._years.get(year, -1)
+
+        if position < 0:
+            return np.full(len(self.countries), np.nan)
+
+        return array[:, position]
+
+
+RANK_METRICS = ('tourist_count', 'expenditure', 'avg_spending', 'crowd_score')
+
+
+class MetricRanks:
+    """
+    一項世界地圖指標每年的排名，按 ISO-3 代碼索引，與該指標的世界地圖 API 結果一致
+
+    - values：年份 × 國家 的數值（不在該年結果中為 NaN）
+    - ranks：年份 × 國家 的名次（從 1 開始，不在結果中為 0）
+    - ranked：每年結果中的國家數
+    - labels：年份 × 國家 在該年結果中的國家名稱（與世界地圖 API 的 country_names 相同，不在結果中為空字串）
+    同一 ISO-3 代碼有多個國家時，取名次最前者（與前端 indexOf 相同）。
+    每項指標只依賴自己的數據來源，其中一份數據無法載入時不影響其他指標；
+    `results(year, *sources)` 返回該年結果的國家名稱、ISO-3 代碼、數值與保留的國家，
+    年份軸為最後一個來源的年份
+    """
+
+    def __init__(self, *sources, results):
+        self.codes = np.array(sorted(set(get_country_mapping().values())), dtype=object)
+        self.years = np.asarray(sources[-1].years)
+        self._codes = {code: i for i, code in enumerate(self.codes.tolist())}
+        self._years = {year: i for i, year in enumerate(self.years.tolist())}
+
+        shape = (len(self.years), len(self.codes))
+        self.values = np.full(shape, np.nan)
+        self.ranks = np.zeros(shape, dtype=np.int32)
+        self.ranked = np.zeros(len(self.years), dtype=np.int32)
+        self.labels = np.full(shape, '', dtype=object)
+
+        for position, year in enumerate(self.years.tolist()):
+            self._rank(position, *results(year, *sources))
+
+        for array in (self.values, self.ranks, self.ranked, self.labels):
+            array.flags.writeable = False
+
+    def country(self, code):
+        """
+        ISO-3 代碼在國家軸上的位置，沒有則為 -1
+        """
+        return self._codes.get(code, -1)
+
+    def year(self, year):
+        """
+        年份在年份軸上的位置，沒有則為 -1
+        """
+        return self._years.get(year, -1)
+
+    def label(self, column, rows):
+        """
+        國家在 `rows` 年份中最後一次出現在結果時的名稱，沒有則為空字串
+        """
+        labels = self.labels[rows, column]
+        labels = labels[labels != '']
+        return labels[-1] if len(labels) else ''
+
+    def _rank(self, position, countries, iso3, values, keep):
+        keep = np.flatnonzero(keep)
+        keep = keep[descending(values[keep])]
+        self.ranked[position] = len(keep)
+
+        if len(keep) == 0:
+            return
+
+        columns = np.array([self._codes.get(code, -1) for code in iso3[keep].tolist()])
+        columns, first = np.unique(columns, return_index=True)
+        first, columns = first[columns >= 0], columns[columns >= 0]
+        self.ranks[position, columns] = first + 1
+        self.values[position, columns] = values[keep[first]]
+        self.labels[position, columns] = countries[keep[first]]
+
+
+def tourist_count_results(year, table, arrivals):
+    # 與 /world-map-data 相同：該年優先級最高的單一指標，沒有 World 數據時不限制 partner
+    position = arrivals.year(year)
+
+    if position >= 0 and arrivals.year_indicators[position] >= 0:
+        countries, iso3, values = arrivals.countries, arrivals.iso3, arrivals.year_values[:, position] * 1000
+    else:
+        countries, iso3, values = np.array([], dtype=object), np.array([], dtype=object), np.array([])
+        index = table.index
+        country_mapping = get_country_mapping()
+
+        for indicator in ARRIVALS_INDICATORS:
+            rows = index.rows([(indicator, partner, year) for partner in index.children(indicator)])
+
+            if len(rows) > 0:
+                df_max = table.frame(rows=rows, columns=['reporter_area_label', 'value']).groupby(
+                    'reporter_area_label'
+                )['value'].max()
+                countries = df_max.index.to_numpy(dtype=object)
+                iso3 = np.array([country_mapping.get(country, '') for country in countries.tolist()], dtype=object)
+                values = df_max.to_numpy(dtype=float) * 1000
+                break
+
+    with np.errstate(invalid='ignore'):
+        return countries, iso3, values, ~np.isnan(values) & (iso3 != '') & (values > 0)
+
+
+def expenditure_results(year, expenditure):
+    values = expenditure.column(expenditure.values, year)
+
+    with np.errstate(invalid='ignore'):
+        return expenditure.countries, expenditure.iso3, values, ~np.isnan(values) & expenditure.mapped & (values > 0)
+
+
+def avg_spending_results(year, spending):
+    values = spending.column(spending.values, year)
+    tourists = spending.column(spending.tourists, year)
+    expenditures = spending.column(spending.expenditures, year)
+    merged = ~np.isnan(tourists) & ~np.isnan(expenditures)
+
+    with np.errstate(invalid='ignore'):
+        return spending.countries, spending.iso3, values, merged & (values > 0) & (values < 100000) & spending.mapped
+
+
+def crowd_score_results(year, arrivals):
+    counts = arrivals.column(arrivals.values, year) * 1000
+    valid = ~np.isnan(counts)
+
+    if not valid.any():
+        return arrivals.countries, arrivals.iso3, counts, valid
+
+    # 與 /world-map-crowd-score 相同的 Min-Max 標準化（0-100）
+    minimum, maximum = counts[valid].min(), counts[valid].max()
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        scores = (counts - minimum) / (maximum - minimum) * 100
+        return arrivals.countries, arrivals.iso3, scores, valid & (scores > 0) & arrivals.mapped
+
+
+def rank_dataset(metric):
+    """
+    指標排名的數據名稱
+    """
+    return f'world_ranks_{metric}'
+
+
+datasets.derive('world_arrivals', ['arrivals'], partial(WorldMetric, indicators=ARRIVALS_INDICATORS))
+datasets.derive('world_expenditure', ['expenditure'], partial(WorldMetric, indicators=EXPENDITURE_INDICATORS))
+datasets.derive('world_avg_spending', ['world_arrivals', 'world_expenditure'], AvgSpending)
+datasets.derive(
+    rank_dataset('tourist_count'), ['arrivals', 'world_arrivals'], partial(MetricRanks, results=tourist_count_results)
+)
+datasets.derive(rank_dataset('expenditure'), ['world_expenditure'], partial(MetricRanks, results=expenditure_results))
+datasets.derive(rank_dataset('avg_spending'), ['world_avg_spending'], partial(MetricRanks, results=avg_spending_results))
+datasets.derive(rank_dataset('crowd_score'), ['world_arrivals'], partial(MetricRanks, results=crowd_score_results))
@@ -0,0 +1,49 @@
+from api.reports.world_map_avg_spending import WorldMapAvgSpendingResource
+from api.reports.world_map_crowd_score import WorldMapCrowdScoreResource
+from api.reports.world_map_data import WorldMapDataResource
+from api.reports.world_map_expenditure import WorldMapExpenditureResource
+from commons.resources import ReportResource
+
+
+# 組合的指標與對應的世界地圖 API
+BUNDLE_METRICS = {
+    'tourist_count': WorldMapDataResource,
+    'expenditure': WorldMapExpenditureResource,
+    'avg_spending': WorldMapAvgSpendingResource,
+    'crowd_score': WorldMapCrowdScoreResource,
+}
+
+
+class WorldMapBundleResource(ReportResource):
+    """
+    世界地圖四項指標 API
+    一次返回指定年份的遊客流量、總消費、平均消費與擁擠度，
+    內容與四個世界地圖 API 相同；各指標共用同一份預先計算的世界地圖陣列。
+    沒有指定年份時各指標使用各自 API 的預設年份
+    """
+    depends_on = ('arrivals', 'expenditure')
+
+    def get(self):
+        year = self.request_year()
+        bundle, errors, failure = {'year': year}, {}, None
+
+        for name, resource_class in BUNDLE_METRICS.items():
+            resource = resource_class()
+            result = resource.report(resource.request_year())
+
+            # 指標無法讀取數據時該指標為空，不影響其他指標
+            if isinstance(result, tuple):
+                bundle[name], errors[name] = None, result[0].get('error')
+                failure = failure or result
+                continue
+
+            bundle[name] = result
+
+        if len(errors) == len(BUNDLE_METRICS):
+            return failure
+
+        if errors:
+            # 無法提供的指標及原因
+            bundle['unavailable'] = errors
+
+        return bundle
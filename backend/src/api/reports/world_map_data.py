@@ -1,43 +1,49 @@
-from flask import request
-from flask_restful import Resource
 import numpy as np
-from flask import current_app
-import pandas as pd
 
 from api.reports.data import get_country_mapping
-from commons import parser
+from api.reports.datasets import ARRIVALS_INDICATORS, datasets, indicator_counts
+from api.reports.world_map import descending, top
+from commons.diagnostics import diagnostics
+from commons.resources import ReportResource
+from commons.timing import timing
 
 
-class WorldMapDataResource(Resource):
+class WorldMapDataResource(ReportResource):
     """
     世界地圖遊客流量數據 API - 顯示各國指定年份的總入境遊客數
     """
+    depends_on = ('arrivals',)
+    default_year = 2023
 
     def get(self):
-        # 載入原始數據
-        path = current_app.config['BASE_DIR'] / 'data/UN_Tourism_inbound_arrivals_by_region_10_2025.csv'
+        return self.report(self.request_year())
 
+    def report(self, year):
+        # 載入原始數據與預先計算的世界地圖陣列
         try:
-            df = pd.read_csv(path)
+            table = datasets.get('arrivals')
+            metric = datasets.get('world_arrivals')
         except Exception as e:
             return {
                 'error': f'無法讀取數據檔案: {str(e)}'
             }, 500
 
-        print("=" * 60)
-        print("DEBUG: WorldMapDataResource")
-        print(f"原始數據行數: {len(df)}")
+        timing.mark('load')
 
-        # 篩選條件
-        year = parser.parse(request.args.get('year'), cast=int, default=2023)
-        print(f"\n請求年份: {year}")
+        # 只取指定年份的數據（透過索引，不掃描整張表）
+        index = table.index
+        year_counts = indicator_counts(table, year)
 
-        # 只取指定年份的數據
-        df_year = df[df['year'] == year].copy()
-        print(f"\n{year} 年的總數據行數: {len(df_year)}")
+        diagnostics.record(
+            'world_map_data.year',
+            rows=len(table),
+            year=year,
+            year_rows=sum(year_counts.values()),
+            indicator_counts=lambda: dict(sorted(year_counts.items(), key=lambda item: -item[1])),
+        )
 
-        if len(df_year) == 0:
-            available_years = sorted(df['year'].unique().tolist())
+        if not year_counts:
+            available_years = index.distinct('year').tolist()
             return {
                 'year': year,
                 'metric': 'tourist_count',
@@ -46,55 +52,51 @@ class WorldMapDataResource(Resource):
                 'debug': {'message': f'No data for year {year}', 'available_years': available_years}
             }
 
-        print(f"\n{year} 年的 indicator_code 分布:")
-        print(df_year['indicator_code'].value_counts())
-
         # ========== 關鍵：選擇優先級最高的單一指標 ==========
 
         # 指標優先級（從高到低）
-        indicator_priority = [
-            'INBD_TRIP_AREA_TOTL_TOUR',  # 1. 總入境遊客（最優先）
-            'INBD_TRIP_AREA_TOUR_ABRD',  # 2. 入境遊客（按地區）
-            'INBD_TRIP_REGN_TOUR',       # 3. 區域入境遊客
-        ]
+        indicator_priority = ARRIVALS_INDICATORS
 
         selected_indicator = None
-        df_filtered = pd.DataFrame()
-
-        # 按優先級選擇第一個存在的指標
-        for indicator in indicator_priority:
-            temp_df = df_year[
-                (df_year['indicator_code'] == indicator) &
-                (df_year['partner_area_label'] == 'World')
-                ]
-
-            if len(temp_df) > 0:
-                selected_indicator = indicator
-                df_filtered = temp_df.copy()
-                print(f"\n✅ 使用指標: {indicator}")
-                print(f"   符合條件的數據行數: {len(df_filtered)}")
-                break
+
+        # 載入時已按優先級為每年選好指標，這裡直接取該年的一欄
+        position = metric.year(year)
+        selected = metric.year_indicators[position] if position >= 0 else -1
+
+        if selected >= 0:
+            selected_indicator = indicator_priority[selected]
+            countries = metric.countries
+            iso3 = metric.iso3
+            values = metric.year_values[:, position]
+            diagnostics.record(
+                'world_map_data.indicator',
+                indicator=selected_indicator,
+                partner='World',
+                countries=lambda: int(metric.present[:, position].sum()),
+            )
 
         # 如果沒有 'World' 數據，嘗試不限制 partner
-        if df_filtered.empty:
-            print("\n⚠️  沒有 'World' 數據，嘗試其他 partner")
+        else:
             for indicator in indicator_priority:
-                temp_df = df_year[df_year['indicator_code'] == indicator]
+                rows = index.rows([(indicator, partner, year) for partner in index.children(indicator)])
 
-                if len(temp_df) > 0:
+                if len(rows) > 0:
                     selected_indicator = indicator
                     # 按國家分組，取最大值（避免重複）
-                    df_filtered = temp_df.groupby('reporter_area_label', as_index=False).agg({
-                        'value': 'max'  # 取最大值
-                    })
-                    df_filtered['indicator_code'] = indicator
-                    print(f"\n✅ 使用指標: {indicator} (無 World 限制)")
-                    print(f"   分組後的國家數: {len(df_filtered)}")
+                    df_max = table.frame(rows=rows, columns=['reporter_area_label', 'value']).groupby(
+                        'reporter_area_label'
+                    )['value'].max()
+                    country_mapping = get_country_mapping()
+                    countries = df_max.index.to_numpy(dtype=str)
+                    iso3 = np.array([country_mapping.get(country, '') for country in countries.tolist()], dtype=object)
+                    values = df_max.to_numpy(dtype=float)
+                    diagnostics.record(
+                        'world_map_data.indicator', indicator=indicator, partner=None, countries=len(countries)
+                    )
                     break
 
-        if df_filtered.empty:
-            print("\n❌ 沒有可用的遊客數據")
-            available_indicators = df_year['indicator_code'].unique().tolist()
+        if selected_indicator is None:
+            diagnostics.record('world_map_data.empty', year=year)
             return {
                 'year': year,
                 'metric': 'tourist_count',
@@ -102,89 +104,57 @@ class WorldMapDataResource(Resource):
                 'stats': {'total_countries': 0, 'total_tourists': 0, 'avg_tourists': 0, 'max_country': None, 'max_value': 0},
                 'debug': {
                     'message': 'No suitable indicator found',
-                    'available_indicators': available_indicators,
+                    'available_indicators': list(year_counts),
                     'tried_indicators': indicator_priority
                 }
             }
 
-        print(f"\n篩選後的數據樣本:")
-        print(df_filtered[['reporter_area_label', 'indicator_code', 'value']].head(10))
-
-        # 轉換數值（千人 -> 人）
-        df_filtered['value'] = pd.to_numeric(df_filtered['value'], errors='coerce') * 1000
-
-        # 移除 NaN
-        df_filtered = df_filtered.dropna(subset=['value'])
-
-        print(f"\n轉換數值後: {len(df_filtered)} 行")
-
-        # ========== 關鍵：確保每個國家只有一條記錄 ==========
-
-        # 如果同一個國家有多條記錄，只取第一條（或最大值）
-        df_grouped = df_filtered.groupby('reporter_area_label', as_index=False).agg({
-            'value': 'first'  # 只取第一個值（因為已經是 World 的總數）
-        })
+        timing.mark('select')
 
-        print(f"\n去重後的國家數: {len(df_grouped)}")
-        print(f"\n數值統計:")
-        print(df_grouped['value'].describe())
-        print(f"\n數值範圍: {df_grouped['value'].min():,.0f} ~ {df_grouped['value'].max():,.0f}")
+        # 轉換數值（千人 -> 人），移除 NaN；每個國家只有一個值
+        values = values * 1000
+        valid = ~np.isnan(values)
 
-        # 獲取國家映射
-        country_mapping = get_country_mapping()
+        # ISO-3 代碼
+        mapped = iso3 != ''
 
-        # 添加 ISO-3 代碼
-        df_grouped['iso3'] = df_grouped['reporter_area_label'].map(country_mapping)
-
-        print(f"\n映射前: {len(df_grouped)} 個國家")
-        print(f"映射後: {df_grouped['iso3'].notna().sum()} 個國家有 ISO 代碼")
-
-        # 顯示未映射的國家（前 10 個）
-        unmapped = df_grouped[df_grouped['iso3'].isna()]['reporter_area_label'].tolist()
-        if len(unmapped) > 0:
-            print(f"\n⚠️ 未映射的國家 ({len(unmapped)} 個):")
-            for country in unmapped[:10]:
-                print(f"  - {country}")
-
-        # 移除沒有 ISO 代碼的國家
-        df_final = df_grouped.dropna(subset=['iso3']).copy()
-
-        # 移除異常值（0 或負數）
-        df_final = df_final[df_final['value'] > 0]
-
-        print(f"\n✅ 最終國家數: {len(df_final)}")
+        # 移除沒有 ISO 代碼的國家與異常值（0 或負數）
+        keep = np.flatnonzero(valid & mapped & (values > 0))
 
         # 排序
-        df_final = df_final.sort_values('value', ascending=False)
-
-        if len(df_final) > 0:
-            print(f"\n🏆 Top 10 國家:")
-            top10 = df_final.head(10)
-            for idx, row in top10.iterrows():
-                tourists = int(row['value'])
-                print(f"  {row['iso3']:3s} | {row['reporter_area_label']:40s} | {tourists:15,} 人")
-
-        print("=" * 60)
+        keep = keep[descending(values[keep])]
+        final_countries, final_iso3, final_values = countries[keep], iso3[keep], values[keep]
+        timing.mark('rank')
+
+        diagnostics.record(
+            'world_map_data.countries',
+            valid=lambda: int(valid.sum()),
+            value_range=lambda: [values[valid].min(), values[valid].max()] if valid.any() else None,
+            mapped=lambda: int((valid & mapped).sum()),
+            unmapped=lambda: countries[valid & ~mapped].tolist(),
+            final=len(keep),
+            top10=lambda: top(final_iso3, final_countries, tourists=final_values),
+        )
 
         # 轉換為前端格式
         map_data = {
-            'countries': [str(x) for x in df_final['iso3'].tolist()],
-            'country_names': [str(x) for x in df_final['reporter_area_label'].tolist()],
-            'values': [float(x) for x in df_final['value'].tolist()]
+            'countries': final_iso3,
+            'country_names': final_countries,
+            'values': final_values
         }
 
         # 統計資訊
-        if len(df_final) > 0:
-            total_tourists = float(df_final['value'].sum())
-            avg_tourists = float(df_final['value'].mean())
-            max_value = float(df_final['value'].max())
-            max_country = str(df_final.iloc[0]['reporter_area_label'])
+        if len(keep) > 0:
+            total_tourists = float(final_values.sum())
+            avg_tourists = float(final_values.mean())
+            max_value = float(final_values.max())
+            max_country = str(final_countries[0])
         else:
             total_tourists = avg_tourists = max_value = 0
             max_country = None
 
         stats = {
-            'total_countries': int(len(df_final)),
+            'total_countries': int(len(keep)),
             'total_tourists': int(total_tourists),
             'avg_tourists': int(avg_tourists),
             'max_country': max_country,
@@ -0,0 +1,95 @@
+import numpy as np
+from flask import request
+
+from api.reports.datasets import datasets
+from api.reports.world_map import RANK_METRICS, rank_dataset
+from commons import parser
+from commons.diagnostics import diagnostics
+from commons.resources import ReportResource
+from commons.timing import timing
+
+
+class WorldMapSeriesResource(ReportResource):
+    """
+    世界地圖多年度數據 API
+    返回指定指標在 from～to 年間的 國家 × 年份 矩陣，數值與各年的世界地圖 API 相同
+    （指標優先級等規則見預先計算的排名陣列），前端可一次取得後逐年播放
+    """
+    depends_on = ('arrivals', 'expenditure')
+
+    def query_args(self):
+        return {
+            'metric': request.args.get('metric', 'tourist_count'),
+            'from': parser.parse(request.args.get('from'), cast=int, default=None),
+            'to': parser.parse(request.args.get('to'), cast=int, default=None),
+        }
+
+    def get(self):
+        # 獲取參數
+        args = self.query_args()
+        metric = args['metric']
+
+        if metric not in RANK_METRICS:
+            return {
+                'error': f'Unknown metric {metric}',
+                'available_metrics': list(RANK_METRICS)
+            }, 400
+
+        # 載入該指標預先計算的排名（含 年份 × 國家 的數值）
+        try:
+            ranks = datasets.get(rank_dataset(metric))
+        except Exception as e:
+            return {'error': f'無法讀取數據檔案: {str(e)}'}, 500
+
+        timing.mark('load')
+        values = ranks.values
+
+        # 年份範圍：預設為該指標有數據的所有年份
+        years_with_data = ranks.years[ranks.ranked > 0]
+
+        if len(years_with_data) == 0:
+            return {
+                'metric': metric,
+                'years': [],
+                'data': {'countries': [], 'country_names': [], 'values': []}
+            }
+
+        first_year = args['from'] if args['from'] is not None else int(years_with_data[0])
+        last_year = args['to'] if args['to'] is not None else int(years_with_data[-1])
+
+        if first_year > last_year:
+            return {
+                'error': f'from ({first_year}) must not be later than to ({last_year})',
+                'metric': metric
+            }, 400
+
+        rows = np.flatnonzero((ranks.years >= first_year) & (ranks.years <= last_year))
+
+        # 只保留範圍內至少有一年數據的國家，轉置為 國家 × 年份
+        matrix = values[rows].T
+        columns = np.flatnonzero(~np.isnan(matrix).all(axis=1))
+        matrix = matrix[columns]
+        timing.mark('select')
+
+        countries = ranks.codes[columns]
+
+        diagnostics.record(
+            'world_map_series.matrix',
+            metric=metric,
+            years=[first_year, last_year],
+            shape=list(matrix.shape),
+            cells=lambda: int((~np.isnan(matrix)).sum()),
+        )
+
+        return {
+            'metric': metric,
+            'from': first_year,
+            'to': last_year,
+            'years': ranks.years[rows],
+            'data': {
+                'countries': countries,
+                # 與世界地圖 API 相同，使用數據中的國家名稱
+                'country_names': [ranks.label(column, rows) for column in columns.tolist()],
+                'values': matrix
+            }
+        }
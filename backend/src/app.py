@@ -5,6 +5,11 @@ import pathlib
 from flask import Flask
 
 from api import api
+from api.reports.datasets import datasets
+from commons.diagnostics import diagnostics
+from commons.metrics import metrics
+from commons.resources import reports
+from commons.timing import timing
 
 PROJECT_ROOT = pathlib.Path(__file__).resolve().parent
 
@@ -29,5 +34,10 @@ def create_app(config_file=None, settings_override=None):
 
     # Load app modules.
     api.init_app(app)
+    diagnostics.init_app(app)
+    timing.init_app(app)
+    datasets.init_app(app)
+    reports.init_app(app)
+    metrics.init_app(app)
 
     return app
@@ -0,0 +1,101 @@
+"""
+In-process LRU cache of report results.
+"""
+import json
+import threading
+from collections import OrderedDict
+
+
+# Returned by `ResultCache.get` on a miss; None is a valid cached value.
+MISSING = object()
+
+
+def result_size(value):
+    """
+    Approximate size of a result in bytes, as its JSON encoding.
+    """
+    return len(json.dumps(value, default=str))
+
+
+class ResultCache:
+    """
+    Least recently used cache bounded both by number of entries and by the
+    total size of the values.
+
+    Each entry records the version of the data it was computed from; looking
+    it up with a different version discards it, so results never outlive a
+    dataset reload.
+    """
+
+    def __init__(self, max_entries=512, max_bytes=64 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.bytes = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key, version):
+        """
+        Cached value for `key` at `version`, or `MISSING`.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry is not None and entry[0] != version:
+                self._remove(key)
+                self.invalidations += 1
+                entry = None
+
+            if entry is None:
+                self.misses += 1
+                return MISSING
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, version, value, size=None):
+        size = result_size(value) if size is None else size
+
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+            self._entries[key] = (version, value, size)
+            self.bytes += size
+
+            while len(self._entries) > self.max_entries or self.bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self.bytes,
+                'max_entries': self.max_entries,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+            }
+
+    def _remove(self, key):
+        _, _, size = self._entries.pop(key)
+        self.bytes -= size
@@ -0,0 +1,533 @@
+"""
+Columnar, memory-mapped storage for parsed data frames.
+
+A frame is stored as one `.npy` file per column: numeric columns as-is,
+text columns dictionary encoded as integer codes plus a unicode array of
+categories. Stores are content addressed by the source file's hash and the
+loader schema, and opened with `mmap_mode='r'`, so every worker process on
+a host maps the same pages of the OS page cache instead of holding its own
+copy of the data. Arrays are always read-only.
+"""
+import hashlib
+import json
+import logging
+import os
+import pathlib
+import shutil
+import tempfile
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+try:
+    import fcntl
+except ImportError:  # not available on Windows
+    fcntl = None
+
+
+logger = logging.getLogger(__name__)
+
+# Bump when the on-disk layout changes.
+FORMAT_VERSION = 2
+
+
+def file_digest(path, chunk_size=1 << 20):
+    """
+    SHA-256 hex digest of a file's content.
+    """
+    digest = hashlib.sha256()
+
+    with open(path, 'rb') as fp:
+        for chunk in iter(lambda: fp.read(chunk_size), b''):
+            digest.update(chunk)
+
+    return digest.hexdigest()
+
+
+class SourceFingerprint:
+    """
+    Identity of a source file: cheap stat fields plus a content hash.
+    """
+    __slots__ = ('mtime_ns', 'size', 'sha256')
+
+    def __init__(self, mtime_ns, size, sha256=None):
+        self.mtime_ns = mtime_ns
+        self.size = size
+        self.sha256 = sha256
+
+    @classmethod
+    def stat(cls, path):
+        stat = os.stat(path)
+        return cls(stat.st_mtime_ns, stat.st_size)
+
+    def same_stat(self, other):
+        return self.mtime_ns == other.mtime_ns and self.size == other.size
+
+    def as_dict(self):
+        return {'mtime_ns': self.mtime_ns, 'size': self.size, 'sha256': self.sha256}
+
+
+class ColumnTable:
+    """
+    Read-only table of named NumPy columns.
+
+    Numeric columns are exposed as-is; text columns as the smallest integer
+    codes that fit (-1 for missing) with their labels in `categories(name)`.
+    Attribute columns, such as a label that is fully determined by a code,
+    are not stored per row: they live in a dimension array indexed by the
+    codes of their key column.
+    """
+
+    def __init__(self, arrays, categories=None, columns=None, attributes=None):
+        self.arrays = arrays
+        self._categories = categories or {}
+        self._attributes = attributes or {}
+        self.columns = list(columns or arrays)
+        self.index = None
+        self._codes = {}
+
+        dimensions = [values for _, values in self._attributes.values()]
+
+        for array in list(arrays.values()) + list(self._categories.values()) + dimensions:
+            array.flags.writeable = False
+
+    def __len__(self):
+        return len(next(iter(self.arrays.values()))) if self.arrays else 0
+
+    def __contains__(self, name):
+        return name in self.arrays or name in self._attributes
+
+    def __getitem__(self, name):
+        return self.arrays[name]
+
+    @property
+    def nbytes(self):
+        dimensions = [values for _, values in self._attributes.values()]
+        return sum(a.nbytes for a in list(self.arrays.values()) + list(self._categories.values()) + dimensions)
+
+    def is_text(self, name):
+        return name in self._categories
+
+    def categories(self, name):
+        return self._categories[name]
+
+    def code(self, name, label):
+        """
+        Integer code of `label` in text column `name`, or -1 if absent.
+        """
+        codes = self._codes.get(name)
+
+        if codes is None:
+            codes = self._codes[name] = {label: i for i, label in enumerate(self._categories[name].tolist())}
+
+        return codes.get(label, -1)
+
+    def equals(self, name, value):
+        """
+        Boolean row mask of `column == value`, comparing codes for text.
+        """
+        if self.is_text(name):
+            return self.arrays[name] == self.code(name, value)
+
+        return self.arrays[name] == value
+
+    def unique(self, name):
+        """
+        Sorted distinct non-missing values of a column.
+        """
+        if self.is_text(name):
+            codes = np.unique(self.arrays[name])
+            return np.sort(self._categories[name][codes[codes >= 0]])
+
+        values = self.decode(name)
+        return np.unique(values[~pd.isna(values)])
+
+    def decode(self, name, rows=None):
+        """
+        Column values, with labels in place of codes for text columns.
+        """
+        if name in self._attributes:
+            key, values = self._attributes[name]
+            return _lookup(values, self.arrays[key] if rows is None else self.arrays[key][rows])
+
+        values = self.arrays[name] if rows is None else self.arrays[name][rows]
+
+        if not self.is_text(name):
+            return values
+
+        return _lookup(self._categories[name], values)
+
+    def frame(self, rows=None, columns=None):
+        """
+        Materialize selected rows (mask, indices or slice) as a DataFrame.
+        """
+        columns = columns or self.columns
+        return pd.DataFrame({name: self.decode(name, rows) for name in columns}, columns=columns)
+
+    @classmethod
+    def from_frame(cls, df, attributes=None, sort_by=None):
+        """
+        Encode a frame. `attributes` maps column names to the text column
+        that determines them; a column that turns out not to be fully
+        determined by its key is stored per row instead. With `sort_by`,
+        rows are stably sorted by the encoded values of those columns, so
+        that a `TableIndex` on them can address any key prefix as a range.
+        """
+        arrays, categories, dimensions = {}, {}, {}
+
+        for name, series in df.items():
+            if name in (attributes or {}):
+                continue
+
+            if pd.api.types.is_numeric_dtype(series.dtype) or pd.api.types.is_bool_dtype(series.dtype):
+                arrays[name] = series.to_numpy().copy()
+
+            else:
+                codes, uniques = pd.factorize(series)
+                arrays[name] = codes.astype(np.int16 if len(uniques) < np.iinfo(np.int16).max else np.int32)
+                categories[name] = np.asarray(uniques, dtype=str)
+
+        for name, key in (attributes or {}).items():
+            pairs = pd.DataFrame({'code': arrays[key], 'value': df[name].to_numpy()}).drop_duplicates()
+            pairs = pairs[pairs['code'] >= 0].sort_values('code')
+
+            if pairs['code'].is_unique and len(pairs) == len(categories[key]):
+                values = pairs['value']
+
+                if pd.api.types.is_numeric_dtype(values.dtype):
+                    dimensions[name] = (key, values.to_numpy())
+                else:
+                    dimensions[name] = (key, np.asarray(values.fillna(''), dtype=str))
+
+            else:
+                codes, uniques = pd.factorize(df[name])
+                arrays[name] = codes.astype(np.int32)
+                categories[name] = np.asarray(uniques, dtype=str)
+
+        if sort_by:
+            order = np.lexsort([arrays[name] for name in reversed(sort_by)])
+            arrays = {name: array[order] for name, array in arrays.items()}
+
+        return cls(arrays, categories, list(df.columns), dimensions)
+
+    def save(self, path):
+        """
+        Write the table to directory `path`, one `.npy` file per array.
+        Returns the column layout needed by `open`.
+        """
+        layout = []
+
+        for i, name in enumerate(self.columns):
+            column = {'name': name, 'key': f'c{i}', 'text': self.is_text(name)}
+
+            if name in self._attributes:
+                column['attribute_of'], values = self._attributes[name]
+                np.save(path / f'c{i}_dimension.npy', values)
+
+            else:
+                np.save(path / f'c{i}.npy', self.arrays[name])
+
+            if self.is_text(name):
+                np.save(path / f'c{i}_categories.npy', self._categories[name])
+
+            layout.append(column)
+
+        return layout
+
+    @classmethod
+    def open(cls, path, layout):
+        """
+        Memory-map a table written by `save`.
+        """
+        arrays, categories, attributes = {}, {}, {}
+
+        for column in layout:
+            name, key = column['name'], column['key']
+
+            if column.get('attribute_of'):
+                attributes[name] = (column['attribute_of'], _map(path / f'{key}_dimension.npy'))
+
+            else:
+                arrays[name] = _map(path / f'{key}.npy')
+
+            if column['text']:
+                categories[name] = _map(path / f'{key}_categories.npy')
+
+        return cls(arrays, categories, [column['name'] for column in layout], attributes)
+
+
+class TableIndex:
+    """
+    Row-range index over a table sorted by `keys` (see `ColumnTable.from_frame`).
+
+    Every prefix of the key is a contiguous run of rows, so the offsets of
+    each prefix of all but the last key are computed once, and a lookup costs
+    a dict access, plus a binary search within the run for a full key,
+    independent of the size of the table. Keys are given as labels for text
+    columns and as values otherwise.
+    """
+
+    def __init__(self, table, keys):
+        self.table = table
+        self.keys = tuple(keys)
+        self._ranges = [{(): (0, len(table))}]
+        self._children = {}
+
+        columns = [table[name] for name in self.keys]
+        change = np.zeros(len(table), dtype=bool)
+        change[:1] = True
+
+        for level in range(1, len(columns)):
+            column = columns[level - 1]
+            change[1:] |= column[1:] != column[:-1]
+            starts = np.flatnonzero(change)
+            stops = np.append(starts[1:], len(table))
+            prefixes = zip(*[column[starts].tolist() for column in columns[:level]])
+            ranges = dict(zip(prefixes, zip(starts.tolist(), stops.tolist())))
+            self._ranges.append(ranges)
+
+            for prefix in ranges:
+                self._children.setdefault(prefix[:-1], []).append(prefix[-1])
+
+        self._distinct = {name: table.unique(name) for name in self.keys}
+
+    def _encode(self, level, value):
+        name = self.keys[level]
+        return self.table.code(name, value) if self.table.is_text(name) else value
+
+    def _decode(self, level, values):
+        name = self.keys[level]
+
+        if not self.table.is_text(name):
+            return values
+
+        return self.table.categories(name)[[code for code in values if code >= 0]].tolist()
+
+    def range(self, *key):
+        """
+        `(start, stop)` rows matching a key prefix; empty if there are none.
+        """
+        codes = tuple(self._encode(level, value) for level, value in enumerate(key))
+
+        if len(codes) < len(self.keys):
+            return self._ranges[len(codes)].get(codes, (0, 0))
+
+        start, stop = self._ranges[-1].get(codes[:-1], (0, 0))
+        column = self.table[self.keys[-1]][start:stop]
+        return (
+            start + int(np.searchsorted(column, codes[-1], 'left')),
+            start + int(np.searchsorted(column, codes[-1], 'right')),
+        )
+
+    def slice(self, *key):
+        return slice(*self.range(*key))
+
+    def size(self, *key):
+        start, stop = self.range(*key)
+        return stop - start
+
+    def rows(self, keys):
+        """
+        Row positions matching any of several key prefixes, in key order.
+        """
+        ranges = [self.range(*key) for key in keys]
+        return np.concatenate([np.arange(start, stop) for start, stop in ranges] or [np.empty(0, dtype=np.intp)])
+
+    def children(self, *key):
+        """
+        Values of the next key column that occur under a key prefix.
+        """
+        codes = tuple(self._encode(level, value) for level, value in enumerate(key))
+
+        if len(codes) < len(self.keys) - 1:
+            values = self._children.get(codes, [])
+        else:
+            values = np.unique(self.table[self.keys[-1]][self.slice(*key)]).tolist()
+
+        return self._decode(len(codes), values) if values else []
+
+    def distinct(self, name):
+        """
+        Sorted distinct values of key column `name`.
+        """
+        return self._distinct[name]
+
+
+def _lookup(values, codes):
+    """
+    Map codes to labels or dimension values; -1 and empty labels become NaN.
+    """
+    valid = codes >= 0
+
+    if values.dtype.kind != 'U':
+        if valid.all():
+            return values[codes]
+
+        result = values[np.where(valid, codes, 0)].astype(float)
+        result[~valid] = np.nan
+        return result
+
+    result = np.full(len(codes), np.nan, dtype=object)
+    result[valid] = values[codes[valid]].astype(object)
+    result[result == ''] = np.nan
+    return result
+
+
+def _map(path):
+    try:
+        return np.load(path, mmap_mode='r')
+    except ValueError:
+        # empty arrays cannot be memory-mapped.
+        return np.load(path)
+
+
+@contextmanager
+def exclusive(lock_path):
+    """
+    Hold an inter-process file lock, where the platform supports one.
+    """
+    if fcntl is None:
+        yield
+        return
+
+    with open(lock_path, 'a') as fp:
+        fcntl.flock(fp, fcntl.LOCK_EX)
+
+        try:
+            yield
+        finally:
+            fcntl.flock(fp, fcntl.LOCK_UN)
+
+
+def read_json(path):
+    try:
+        with open(path) as fp:
+            return json.load(fp)
+    except (OSError, ValueError):
+        return None
+
+
+def write_json(path, data):
+    """
+    Atomically replace `path` with `data` encoded as JSON.
+    """
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+
+    with os.fdopen(fd, 'w') as fp:
+        json.dump(data, fp)
+
+    os.chmod(tmp_path, 0o644)
+    os.replace(tmp_path, path)
+
+
+class ColumnStore:
+    """
+    Directory of memory-mapped tables.
+
+    Each dataset gets one store per (source hash, schema), named
+    `<name>-<key>/`, and a `<name>.json` pointer recording the source stat
+    so unchanged files are validated without hashing. Builds are serialized
+    across processes with a lock file, so a cold host parses each source once.
+    """
+
+    def __init__(self, path):
+        self.path = pathlib.Path(path)
+
+    def load(self, name, source, build, schema):
+        """
+        Open the table for `source`, building it with `build(source)` first
+        if necessary. Returns `(table, fingerprint)`.
+        """
+        fingerprint = SourceFingerprint.stat(source)
+        pointer_path = self.path / f'{name}.json'
+        pointer = read_json(pointer_path)
+
+        if pointer and pointer.get('format') == FORMAT_VERSION and pointer.get('schema') == schema:
+            recorded = SourceFingerprint(**pointer['source'])
+
+            if recorded.same_stat(fingerprint):
+                table = self._open(pointer['store'])
+
+                if table is not None:
+                    fingerprint.sha256 = recorded.sha256
+                    return table, fingerprint
+
+        fingerprint.sha256 = file_digest(source)
+        key = hashlib.sha256(f'{FORMAT_VERSION}:{schema}:{fingerprint.sha256}'.encode()).hexdigest()[:16]
+        store = f'{name}-{key}'
+        self.path.mkdir(parents=True, exist_ok=True)
+
+        with exclusive(self.path / f'{name}.lock'):
+            table = self._open(store)
+
+            if table is None:
+                table = self._build(store, source, build)
+
+            write_json(pointer_path, {
+                'format': FORMAT_VERSION,
+                'schema': schema,
+                'source': fingerprint.as_dict(),
+                'store': store,
+            })
+            self._prune(name, store)
+
+        return table, fingerprint
+
+    def _open(self, store):
+        meta = read_json(self.path / store / 'meta.json')
+
+        if meta is None:
+            return None
+
+        try:
+            return ColumnTable.open(self.path / store, meta['columns'])
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def _build(self, store, source, build):
+        table = build(source)
+        tmp_path = pathlib.Path(tempfile.mkdtemp(dir=self.path, prefix=f'.{store}.'))
+
+        try:
+            layout = table.save(tmp_path)
+            write_json(tmp_path / 'meta.json', {'columns': layout})
+            os.chmod(tmp_path, 0o755)
+            shutil.rmtree(self.path / store, ignore_errors=True)
+            os.rename(tmp_path, self.path / store)
+
+        except BaseException:
+            shutil.rmtree(tmp_path, ignore_errors=True)
+            raise
+
+        return self._open(store)
+
+    def _prune(self, name, keep):
+        """
+        Remove superseded stores. Processes still mapping them are unaffected:
+        unlinked files stay valid for as long as they are mapped.
+        """
+        for path in self.path.glob(f'{name}-*'):
+            if path.name != keep and path.is_dir():
+                shutil.rmtree(path, ignore_errors=True)
+
+
+def load_cached(source, cache_dir, name, build, schema):
+    """
+    Load `source` as a read-only `ColumnTable` built by `build(source)`.
+
+    With a cache directory the table is memory-mapped from a shared column
+    store and rebuilt when the source's content changes; without one, or if
+    the store is unusable, it is parsed into private memory.
+    Returns `(table, fingerprint)`.
+    """
+    fingerprint = SourceFingerprint.stat(source)
+
+    if cache_dir:
+        try:
+            return ColumnStore(cache_dir).load(name, source, build, schema)
+        except OSError as e:
+            logger.warning('Unable to use dataset cache %s: %s', cache_dir, e)
+
+    fingerprint.sha256 = file_digest(source)
+    return build(source), fingerprint
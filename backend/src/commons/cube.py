@@ -0,0 +1,88 @@
+"""
+Dense, labelled NumPy arrays.
+"""
+import numpy as np
+import pandas as pd
+
+
+class Cube:
+    """
+    Dense array of floats with one labelled axis per dimension; cells with no
+    data hold NaN. `present` marks cells that had at least one source row,
+    even if its value was missing.
+    """
+
+    def __init__(self, axes, values, present=None):
+        self.axes = dict(axes)
+        self.values = values
+        self.present = present if present is not None else ~np.isnan(values)
+        self._positions = {
+            name: {label: i for i, label in enumerate(labels.tolist())}
+            for name, labels in self.axes.items()
+        }
+
+        for array in list(self.axes.values()) + [self.values, self.present]:
+            array.flags.writeable = False
+
+    @property
+    def shape(self):
+        return self.values.shape
+
+    def labels(self, axis):
+        return self.axes[axis]
+
+    def position(self, axis, label):
+        """
+        Position of `label` along `axis`, or -1 if absent.
+        """
+        return self._positions[axis].get(label, -1)
+
+    @classmethod
+    def from_table(cls, table, rows, axes, value='value'):
+        """
+        Scatter `value` of the given rows (indices or slice) of a
+        `ColumnTable` into a cube.
+
+        `axes` maps column names to their labels, in order; None uses the
+        sorted distinct values found in those rows. Rows whose labels are not
+        on an axis are ignored. When several rows fall into one cell, the
+        first with a value wins.
+        """
+        axes = dict(axes)
+        coordinates = []
+
+        for name, labels in axes.items():
+            if labels is None:
+                labels = np.sort(pd.Series(table.decode(name, rows)).dropna().unique())
+
+            labels = np.asarray(labels, dtype=str if table.is_text(name) else None)
+
+            if table.is_text(name):
+                # map each category to its axis position once, then index by code.
+                lookup = pd.Index(labels).get_indexer(table.categories(name))
+                coordinates.append(np.append(lookup, -1)[table[name][rows]])
+            else:
+                coordinates.append(pd.Index(labels).get_indexer(table[name][rows]))
+
+            axes[name] = labels
+
+        shape = tuple(len(labels) for labels in axes.values())
+        values = np.full(shape, np.nan)
+        present = np.zeros(shape, dtype=bool)
+
+        if not coordinates:
+            return cls(axes, values, present)
+
+        valid = np.logical_and.reduce([c >= 0 for c in coordinates])
+        cells = np.ravel_multi_index([c[valid] for c in coordinates], shape) if valid.any() else np.empty(0, np.intp)
+        data = table[value][rows][valid].astype(float)
+
+        # first row with a value per cell: stable sort by cell, values before NaN.
+        order = np.lexsort((np.isnan(data), cells))
+        cells, data = cells[order], data[order]
+        first = np.ones(len(cells), dtype=bool)
+        first[1:] = cells[1:] != cells[:-1]
+
+        values.flat[cells[first]] = data[first]
+        present.flat[cells] = True
+        return cls(axes, values, present)
@@ -0,0 +1,447 @@
+"""
+Process-wide registry of report datasets.
+
+Datasets are declared once at import time and loaded at most once per
+application, either eagerly when the app is created or lazily on first use.
+Each dataset is held as a read-only `ColumnTable` memory-mapped from a
+columnar store shared by all worker processes (see `commons.columnar`), and
+is reloaded when its source file changes. Derived values, computed from
+one or more datasets, are rebuilt whenever those are reloaded.
+"""
+import collections
+import pathlib
+import threading
+import time
+
+import click
+import pandas as pd
+from flask import current_app, g
+from flask.cli import AppGroup
+
+from commons.columnar import ColumnTable, SourceFingerprint, TableIndex, load_cached
+
+
+cli = AppGroup('datasets', help='Inspect report datasets.')
+
+
+class Dataset:
+    """
+    Declaration of a named data source: a file under DATA_DIR and the
+    loader that parses it into a normalized DataFrame. `attributes` maps
+    columns that are fully determined by a text column (labels, units) to
+    that column, so they are kept in a dimension table instead of per row.
+    `index` names the columns the table is sorted and indexed by, exposed as
+    `table.index` (see `commons.columnar.TableIndex`).
+
+    Bump `version` whenever the loader output changes so cached copies
+    built by an older loader are discarded.
+    """
+    __slots__ = ('name', 'path', 'loader', 'attributes', 'index', 'version')
+
+    def __init__(self, name, path, loader, attributes=None, index=None, version=1):
+        self.name = name
+        self.path = path
+        self.loader = loader
+        self.attributes = attributes
+        self.index = index
+        self.version = version
+
+    @property
+    def schema(self):
+        schema = f'{self.loader.__module__}.{self.loader.__qualname__}:{self.version}'
+        return f'{schema}:{",".join(self.index)}' if self.index else schema
+
+    def build(self, path):
+        return ColumnTable.from_frame(self.loader(path), self.attributes, sort_by=self.index)
+
+
+class Snapshot(collections.namedtuple('Snapshot', ('data', 'version', 'modified'))):
+    """
+    Data of a dataset or derived value together with the version and the
+    modification time of the sources it was built from.
+    """
+    __slots__ = ()
+
+
+class DatasetHandle:
+    """
+    Loaded state of a single dataset within one application.
+
+    Loading is guarded by a lock so concurrent threads parse the source file
+    only once; after that, reads are lock free. Every `check_interval`
+    seconds the source file is stat'ed and the dataset reloaded if it has
+    changed, while other threads keep reading the previous data.
+
+    The data and the fingerprint of its source are published together, in
+    a single assignment, so a reader never sees the data of one version of
+    the source with the fingerprint of another.
+    """
+
+    def __init__(self, dataset, data_dir, cache_dir=None, check_interval=None):
+        self.dataset = dataset
+        self.path = pathlib.Path(data_dir) / dataset.path
+        self.cache_dir = cache_dir
+        self.check_interval = check_interval
+        self.loads = 0
+        self.load_seconds = 0.0
+        self._state = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self):
+        return self._state is not None
+
+    @property
+    def fingerprint(self):
+        return self._state[1] if self._state is not None else None
+
+    @property
+    def version(self):
+        """
+        Content hash of the source the loaded data was built from, with the
+        schema of the loader output, so that a new loader version changes it.
+        """
+        return self._version(self.fingerprint)
+
+    @property
+    def modified(self):
+        """
+        Modification time of the source the loaded data was built from.
+        """
+        return self._modified(self.fingerprint)
+
+    @property
+    def nbytes(self):
+        """
+        Size of the arrays of the loaded data.
+        """
+        return self._state[0].nbytes if self._state is not None else 0
+
+    def get(self):
+        """
+        Return the loaded data, loading it first if necessary.
+        """
+        return self.snapshot().data
+
+    def snapshot(self):
+        """
+        Return the loaded data with its version, loading it first if
+        necessary.
+        """
+        state = self._state
+
+        if state is None:
+            with self._lock:
+                state = self._state
+
+                if state is None:
+                    state = self._load()
+
+        elif self._should_check() and self._lock.acquire(blocking=False):
+            try:
+                if self._changed(state[1]):
+                    state = self._load()
+            finally:
+                self._lock.release()
+
+        data, fingerprint = state
+        return Snapshot(data, self._version(fingerprint), self._modified(fingerprint))
+
+    def _version(self, fingerprint):
+        return f'{fingerprint.sha256}:{self.dataset.schema}' if fingerprint else None
+
+    @staticmethod
+    def _modified(fingerprint):
+        return fingerprint.mtime_ns / 1e9 if fingerprint else None
+
+    def _should_check(self):
+        return self.check_interval is not None and time.monotonic() - self._checked_at >= self.check_interval
+
+    def _changed(self, fingerprint):
+        self._checked_at = time.monotonic()
+
+        try:
+            return not fingerprint.same_stat(SourceFingerprint.stat(self.path))
+        except OSError:
+            return False
+
+    def _load(self):
+        started = time.perf_counter()
+        data, fingerprint = load_cached(
+            self.path, self.cache_dir, self.dataset.name, self.dataset.build, self.dataset.schema
+        )
+
+        if self.dataset.index:
+            data.index = TableIndex(data, self.dataset.index)
+
+        self._checked_at = time.monotonic()
+        state = self._state = (data, fingerprint)
+        self.loads += 1
+        self.load_seconds += time.perf_counter() - started
+        return state
+
+
+class Derived:
+    """
+    Declaration of a value computed from other datasets, such as a dense
+    array or a lookup table the reports read instead of the raw rows.
+    """
+    __slots__ = ('name', 'sources', 'build')
+
+    def __init__(self, name, sources, build):
+        self.name = name
+        self.sources = tuple(sources)
+        self.build = build
+
+
+class DerivedHandle:
+    """
+    Computed state of a derived value within one application.
+
+    The value is rebuilt, once, when the data of any of its sources is
+    replaced; until then every request gets the same object.
+    """
+
+    def __init__(self, derived, store):
+        self.derived = derived
+        self.store = store
+        self._state = None
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self):
+        return self._state is not None
+
+    @property
+    def version(self):
+        """
+        Versions of the sources, in declaration order.
+        """
+        return ':'.join(str(self.store.handle(name).version) for name in self.derived.sources)
+
+    @property
+    def modified(self):
+        """
+        Latest modification time of the sources.
+        """
+        times = [self.store.handle(name).modified for name in self.derived.sources]
+        return None if None in times else max(times)
+
+    def get(self):
+        return self.snapshot([self.store.snapshot(name) for name in self.derived.sources]).data
+
+    def snapshot(self, sources):
+        """
+        Return the value built from the `sources` snapshots, with their
+        versions; the value is only rebuilt when their data changes.
+        """
+        inputs = tuple(source.data for source in sources)
+        state = self._state
+
+        if state is None or not _same(inputs, state[1]):
+            with self._lock:
+                state = self._state
+
+                if state is None or not _same(inputs, state[1]):
+                    state = self._state = (self.derived.build(*inputs), inputs)
+
+        times = [source.modified for source in sources]
+        return Snapshot(
+            state[0],
+            ':'.join(str(source.version) for source in sources),
+            None if None in times else max(times)
+        )
+
+
+def _same(inputs, previous):
+    return all(a is b for a, b in zip(inputs, previous))
+
+
+class DatasetStore:
+    """
+    Per application collection of dataset handles.
+    """
+
+    def __init__(self, datasets, derived, data_dir, cache_dir=None, check_interval=None):
+        if cache_dir:
+            # relative cache directories live inside the data directory.
+            cache_dir = pathlib.Path(data_dir) / cache_dir
+
+        self.handles = {
+            name: DatasetHandle(dataset, data_dir, cache_dir, check_interval)
+            for name, dataset in datasets.items()
+        }
+        self.derived = {name: DerivedHandle(derived, self) for name, derived in derived.items()}
+
+    def handle(self, name):
+        return self.handles[name] if name in self.handles else self.derived[name]
+
+    def __getitem__(self, name):
+        return self.snapshot(name).data
+
+    def snapshot(self, name, view=None):
+        """
+        Data of `name` with its version, loading it first if necessary.
+        Derived values are built from the snapshots of their sources in
+        `view`, the store itself by default.
+        """
+        if name in self.handles:
+            return self.handles[name].snapshot()
+
+        view = self if view is None else view
+        derived = self.derived[name]
+        return derived.snapshot([view.snapshot(source) for source in derived.derived.sources])
+
+    def version(self, name):
+        """
+        Version of the data of `name`, loading it first if necessary;
+        None if it cannot be loaded.
+        """
+        try:
+            return self.snapshot(name).version
+        except Exception:
+            return None
+
+    def modified(self, name):
+        """
+        Modification time of the sources of the loaded data of `name`, as a
+        timestamp; None if it is not loaded.
+        """
+        return self.handle(name).modified
+
+    def preload(self, names):
+        for name in names:
+            self[name]
+
+
+class DatasetView:
+    """
+    Consistent view of a store for one request: the first read of each
+    dataset or derived value is kept, and every later read of it, including
+    as a source of a derived value, gets that same snapshot. A report is
+    then computed from exactly the data whose versions it is cached and
+    validated under, even while its sources are being reloaded.
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self.snapshots = {}
+
+    def __getitem__(self, name):
+        return self.snapshot(name).data
+
+    def snapshot(self, name):
+        snapshot = self.snapshots.get(name)
+
+        if snapshot is None:
+            snapshot = self.snapshots[name] = self.store.snapshot(name, self)
+
+        return snapshot
+
+    def version(self, name):
+        """
+        Version of the data of `name` in this view; None if it cannot be
+        loaded.
+        """
+        try:
+            return self.snapshot(name).version
+        except Exception:
+            return None
+
+    def modified(self, name):
+        """
+        Modification time of the sources of the data of `name` in this view;
+        None if it cannot be loaded.
+        """
+        try:
+            return self.snapshot(name).modified
+        except Exception:
+            return None
+
+
+class DatasetRegistry:
+    """
+    Declares datasets and binds them to Flask applications.
+
+    Loaded tables are shared by every request, thread and worker process and
+    their arrays are read-only; use `ColumnTable.frame()` to materialize the
+    rows a request needs.
+    """
+
+    def __init__(self):
+        self.datasets = {}
+        self.derived = {}
+
+    def register(self, name, path, loader, attributes=None, index=None, version=1):
+        """
+        Declare a dataset read from `path` (relative to DATA_DIR) by `loader`.
+        """
+        self.datasets[name] = Dataset(name, path, loader, attributes, index, version)
+
+    def derive(self, name, sources, build):
+        """
+        Declare `name` as `build(*data)` of the named datasets or derived
+        values, recomputed whenever any of them is reloaded.
+        """
+        self.derived[name] = Derived(name, sources, build)
+
+    def init_app(self, app):
+        store = DatasetStore(
+            self.datasets,
+            self.derived,
+            app.config['DATA_DIR'],
+            cache_dir=app.config.get('DATASETS_CACHE_DIR'),
+            check_interval=app.config.get('DATASETS_CHECK_INTERVAL')
+        )
+        app.extensions['datasets'] = store
+        app.cli.add_command(cli)
+
+        preload = app.config.get('DATASETS_PRELOAD') or []
+
+        if '*' in preload:
+            preload = list(self.datasets) + list(self.derived)
+
+        store.preload(preload)
+
+    @staticmethod
+    def view():
+        """
+        Start a consistent view of the datasets (see `DatasetView`) for the
+        current request; `get` reads from it until the request ends.
+        """
+        view = g.datasets_view = DatasetView(current_app.extensions['datasets'])
+        return view
+
+    @staticmethod
+    def get(name):
+        """
+        Return the data of dataset `name` for the current application, from
+        the view of the current request if one was started.
+        """
+        return g.get('datasets_view', current_app.extensions['datasets'])[name]
+
+
+@cli.command('report')
+def report_command():
+    """
+    Print bytes per row of each dataset, as a raw pandas frame of the whole
+    CSV and as the compact column table that is actually served.
+    """
+    store = current_app.extensions['datasets']
+    click.echo(f'{"dataset":<16}{"rows":>8}{"raw B/row":>12}{"table B/row":>14}{"ratio":>8}')
+
+    for name, handle in store.handles.items():
+        try:
+            table = handle.get()
+            raw = pd.read_csv(handle.path)
+        except OSError as e:
+            click.echo(f'{name:<16}unavailable: {e}')
+            continue
+
+        raw_bytes = raw.memory_usage(index=True, deep=True).sum() / max(len(raw), 1)
+        table_bytes = table.nbytes / max(len(table), 1)
+        click.echo(
+            f'{name:<16}{len(table):>8}{raw_bytes:>12.1f}{table_bytes:>14.1f}'
+            f'{raw_bytes / max(table_bytes, 1e-9):>7.1f}x'
+        )
@@ -0,0 +1,109 @@
+"""
+Diagnostics of report computations.
+
+Resources describe their intermediate results with
+`diagnostics.record(event, **fields)`. Fields given as callables are only
+evaluated, and records only made, when diagnostics are enabled, so that
+summaries nobody reads cost nothing:
+
+* for every request, when the `reports.diagnostics` logger is enabled for
+  DEBUG (see DIAGNOSTICS_LEVEL); records are logged with their fields in
+  `record.diagnostics`, one JSON object per line;
+* for a single request, with the `debug` query argument when
+  DIAGNOSTICS_REQUESTS allows it; records are also returned with the
+  response.
+"""
+import json
+import logging
+
+import numpy as np
+from flask import current_app, g, has_request_context, request
+
+from commons import parser
+
+
+logger = logging.getLogger('reports.diagnostics')
+
+
+def _jsonable(obj):
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+
+    if isinstance(obj, np.generic):
+        return obj.item()
+
+    if hasattr(obj, 'to_dict'):
+        return obj.to_dict()
+
+    return str(obj)
+
+
+class JSONFormatter(logging.Formatter):
+    """
+    Formats diagnostic records as JSON objects.
+    """
+
+    def format(self, record):
+        return json.dumps({
+            'time': self.formatTime(record),
+            'event': record.getMessage(),
+            **getattr(record, 'diagnostics', {}),
+        }, default=_jsonable, ensure_ascii=False)
+
+
+class Diagnostics:
+    """
+    Level-gated, lazily evaluated diagnostic records.
+    """
+
+    def init_app(self, app):
+        logger.setLevel(app.config.get('DIAGNOSTICS_LEVEL', 'WARNING').upper())
+
+        if not logger.handlers:
+            handler = logging.StreamHandler()
+            handler.setFormatter(JSONFormatter())
+            logger.addHandler(handler)
+            logger.propagate = False
+
+        app.extensions['diagnostics'] = self
+
+    def requested(self):
+        """
+        Whether the current request asks for its diagnostics.
+        """
+        return (
+            current_app.config.get('DIAGNOSTICS_REQUESTS', False)
+            and parser.parse(request.args.get('debug'), cast=bool, default=False)
+        )
+
+    def collect(self):
+        """
+        Collect the records of the rest of the current request; returns the
+        list they are appended to.
+        """
+        g.diagnostics = []
+        return g.diagnostics
+
+    def enabled(self):
+        if has_request_context() and g.get('diagnostics') is not None:
+            return True
+
+        return logger.isEnabledFor(logging.DEBUG)
+
+    def record(self, event, **fields):
+        """
+        Record `event` with `fields`, calling those that are callable, if
+        diagnostics are enabled.
+        """
+        if not self.enabled():
+            return
+
+        fields = {name: value() if callable(value) else value for name, value in fields.items()}
+        logger.debug(event, extra={'diagnostics': fields})
+
+        if has_request_context() and g.get('diagnostics') is not None:
+            # plain JSON values, to be returned with the response.
+            g.diagnostics.append(json.loads(json.dumps({'event': event, **fields}, default=_jsonable)))
+
+
+diagnostics = Diagnostics()
@@ -0,0 +1,175 @@
+"""
+Single-flight execution: concurrent calls with the same key share one result.
+
+Within a process, the first caller for a key computes the result while later
+callers wait for it. With a lock directory, the computing thread also takes a
+per-key file lock, so that identical requests handled by other worker
+processes on the host wait for it and read its result from a file instead of
+computing it again. Lock and result files of keys that are no longer in
+flight are removed once their result has expired.
+"""
+import hashlib
+import json
+import logging
+import pathlib
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # not available on Windows
+    fcntl = None
+
+from commons.columnar import exclusive, read_json, write_json
+
+
+logger = logging.getLogger(__name__)
+
+
+class _Call:
+    __slots__ = ('done', 'result', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls of `do(key, fn)` with equal keys.
+
+    Results shared across processes are converted to JSON serializable data
+    by `encode` and back by `decode`; they are kept for `ttl` seconds, long
+    enough for the processes that were waiting on the lock to pick them up.
+    """
+
+    def __init__(self, lock_dir=None, ttl=2.0, encode=None, decode=None):
+        self.lock_dir = pathlib.Path(lock_dir) if lock_dir else None
+        self.ttl = ttl
+        self.encode = encode or _encode
+        self.decode = decode or _decode
+        self.calls = 0
+        self.shared = 0
+        self._flights = {}
+        self._lock = threading.Lock()
+        self._pruned = 0.0
+
+    def do(self, key, fn):
+        """
+        Return `fn()`, or the result of an identical call already in flight.
+        """
+        with self._lock:
+            self.calls += 1
+            call = self._flights.get(key)
+            leader = call is None
+
+            if leader:
+                call = self._flights[key] = _Call()
+            else:
+                self.shared += 1
+
+        if not leader:
+            call.done.wait()
+
+            if call.error is not None:
+                raise call.error
+
+            return call.result
+
+        try:
+            call.result = self._run(key, fn)
+
+        except Exception as e:
+            call.error = e
+            raise
+
+        finally:
+            with self._lock:
+                del self._flights[key]
+
+            call.done.set()
+
+        return call.result
+
+    def _run(self, key, fn):
+        if self.lock_dir is None:
+            return fn()
+
+        digest = hashlib.sha256(repr(key).encode()).hexdigest()[:32]
+        result_path = self.lock_dir / f'{digest}.json'
+
+        try:
+            self.lock_dir.mkdir(parents=True, exist_ok=True)
+        except OSError as e:
+            logger.warning('Unable to coalesce across processes in %s: %s', self.lock_dir, e)
+            return fn()
+
+        with exclusive(self.lock_dir / f'{digest}.lock'):
+            shared = read_json(result_path)
+
+            if shared and shared.get('key') == repr(key) and time.time() - shared['time'] < self.ttl:
+                with self._lock:
+                    self.shared += 1
+
+                return self.decode(shared['result'])
+
+            result = fn()
+
+            try:
+                encoded = self.encode(result)
+                # fail before anything is written if the result is not serializable.
+                json.dumps(encoded)
+                write_json(result_path, {'key': repr(key), 'time': time.time(), 'result': encoded})
+            except (TypeError, ValueError, OSError):
+                # not serializable or not writable: other processes compute it themselves.
+                pass
+
+        self._prune()
+        return result
+
+    def _prune(self):
+        """
+        Remove the files of keys whose result has expired and whose lock is
+        free, at most once per `ttl`. Keys include request arguments, so
+        without this the directory would grow with every distinct request.
+        """
+        now = time.time()
+
+        with self._lock:
+            if now - self._pruned < self.ttl:
+                return
+
+            self._pruned = now
+
+        for lock_path in self.lock_dir.glob('*.lock'):
+            result_path = lock_path.with_suffix('.json')
+
+            try:
+                if now - lock_path.stat().st_mtime < self.ttl:
+                    continue
+
+                with open(lock_path, 'a') as fp:
+                    if fcntl is not None:
+                        # a key in flight keeps its files.
+                        fcntl.flock(fp, fcntl.LOCK_EX | fcntl.LOCK_NB)
+
+                    shared = read_json(result_path)
+
+                    if shared and now - shared['time'] < self.ttl:
+                        continue
+
+                    result_path.unlink(missing_ok=True)
+                    lock_path.unlink()
+            except OSError:
+                # locked or already removed by another process.
+                continue
+
+
+def _encode(result):
+    # resources return either data or a (data, status[, headers]) tuple.
+    return {'tuple': list(result)} if isinstance(result, tuple) else {'value': result}
+
+
+def _decode(result):
+    return tuple(result['tuple']) if 'tuple' in result else result['value']
@@ -0,0 +1,402 @@
+"""
+Runtime metrics in the Prometheus text exposition format.
+
+Each process keeps its metrics in memory. With a metrics directory
+(METRICS_DIR, relative to DATA_DIR), every process also writes a snapshot of
+them to `<pid>.json` there, at most every METRICS_FLUSH_INTERVAL seconds, and
+`render()` aggregates the snapshots of all processes, so that any gunicorn
+worker answers for the whole host:
+
+* counters and histograms are summed, including those of exited workers,
+  which are folded into `archive.json`;
+* gauges are summed, or maxed, over the live processes only.
+"""
+import json
+import logging
+import math
+import os
+import pathlib
+import threading
+import time
+
+from flask import current_app, g, request
+
+from commons.columnar import exclusive, read_json, write_json
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Metric:
+    __slots__ = ('name', 'kind', 'help', 'buckets', 'mode')
+
+    def __init__(self, name, kind, help, buckets=None, mode='sum'):
+        self.name = name
+        self.kind = kind
+        self.help = help
+        self.buckets = buckets
+        self.mode = mode
+
+
+def _key(name, labels):
+    return json.dumps([name, sorted(labels.items())])
+
+
+class Registry:
+    """
+    Metric definitions and the values of this process.
+
+    Values are keyed by metric name and labels. Collectors are callables
+    returning `(name, labels, value)` samples read from other objects, such as
+    cache counters, when a snapshot is taken.
+    """
+
+    def __init__(self, path=None, flush_interval=1.0):
+        self.path = pathlib.Path(path) if path else None
+        self.flush_interval = flush_interval
+        self.metrics = {}
+        self._values = {}
+        self._collectors = []
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._flusher_pid = None
+
+    def counter(self, name, help):
+        self.metrics[name] = Metric(name, 'counter', help)
+
+    def gauge(self, name, help, mode='sum'):
+        self.metrics[name] = Metric(name, 'gauge', help, mode=mode)
+
+    def histogram(self, name, help, buckets=DEFAULT_BUCKETS):
+        self.metrics[name] = Metric(name, 'histogram', help, buckets=tuple(buckets))
+
+    def collector(self, collect):
+        self._collectors.append(collect)
+
+    def inc(self, name, value=1.0, **labels):
+        key = _key(name, labels)
+
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + value
+            self._touch()
+
+    def observe(self, name, value, **labels):
+        buckets = self.metrics[name].buckets
+        key = _key(name, labels)
+
+        with self._lock:
+            counts = self._values.get(key)
+
+            if counts is None:
+                # one count per bucket, then the sum and the count.
+                counts = self._values[key] = [0] * len(buckets) + [0.0, 0]
+
+            for i, bound in enumerate(buckets):
+                if value <= bound:
+                    counts[i] += 1
+
+            counts[-2] += value
+            counts[-1] += 1
+            self._touch()
+
+    def snapshot(self):
+        """
+        Values of this process, collectors included.
+        """
+        with self._lock:
+            values = {key: list(value) if isinstance(value, list) else value for key, value in self._values.items()}
+
+        for collect in self._collectors:
+            for name, labels, value in collect():
+                values[_key(name, labels)] = value
+
+        return values
+
+    def render(self):
+        """
+        All metrics in the Prometheus text format.
+        """
+        if self.path is None:
+            return self._render(self.snapshot())
+
+        self.flush()
+        return self._render(self._aggregate())
+
+    def flush(self):
+        """
+        Write the snapshot of this process to the metrics directory.
+        """
+        if self.path is None:
+            return
+
+        try:
+            self.path.mkdir(parents=True, exist_ok=True)
+            write_json(self.path / f'{os.getpid()}.json', self.snapshot())
+        except OSError as e:
+            logger.warning('Unable to write metrics to %s: %s', self.path, e)
+
+    def _touch(self):
+        # called with the lock held.
+        self._dirty = True
+
+        if self.path is not None and self._flusher_pid != os.getpid():
+            # first update in this process (workers are forked).
+            self._flusher_pid = os.getpid()
+            self._archive_pid_file(os.getpid())
+            threading.Thread(target=self._flush_loop, name='metrics-flush', daemon=True).start()
+
+    def _flush_loop(self):
+        pid = os.getpid()
+
+        while self._flusher_pid == pid:
+            time.sleep(self.flush_interval)
+
+            if self._dirty:
+                self._dirty = False
+                self.flush()
+
+    def _aggregate(self):
+        """
+        Values of all processes: those of live processes, plus the archived
+        counters and histograms of exited ones.
+        """
+        totals, gauges = {}, {}
+
+        with exclusive(self.path / 'archive.lock'):
+            archive = read_json(self.path / 'archive.json') or {}
+
+            for path in self.path.glob('*.json'):
+                if not path.stem.isdigit():
+                    continue
+
+                pid = int(path.stem)
+                values = read_json(path) or {}
+
+                if not _alive(pid):
+                    self._fold(archive, values)
+                    path.unlink()
+                    continue
+
+                for key, value in values.items():
+                    name = json.loads(key)[0]
+                    metric = self.metrics.get(name)
+
+                    if metric is None:
+                        continue
+
+                    if metric.kind == 'gauge':
+                        combine = max if metric.mode == 'max' else _add
+                        gauges[key] = combine(gauges[key], value) if key in gauges else value
+                    else:
+                        totals[key] = _add(totals[key], value) if key in totals else value
+
+            write_json(self.path / 'archive.json', archive)
+
+        for key, value in archive.items():
+            totals[key] = _add(totals[key], value) if key in totals else value
+
+        return {**totals, **gauges}
+
+    def _fold(self, archive, values):
+        for key, value in values.items():
+            metric = self.metrics.get(json.loads(key)[0])
+
+            if metric is not None and metric.kind != 'gauge':
+                archive[key] = _add(archive[key], value) if key in archive else value
+
+    def _archive_pid_file(self, pid):
+        """
+        Fold the file left by an exited process with the same pid.
+        """
+        path = self.path / f'{pid}.json'
+
+        if not path.exists():
+            return
+
+        try:
+            with exclusive(self.path / 'archive.lock'):
+                archive = read_json(self.path / 'archive.json') or {}
+                self._fold(archive, read_json(path) or {})
+                write_json(self.path / 'archive.json', archive)
+                path.unlink()
+        except OSError as e:
+            logger.warning('Unable to archive metrics of %s: %s', path, e)
+
+    def _render(self, values):
+        samples = {}
+
+        for key, value in values.items():
+            name, labels = json.loads(key)
+            samples.setdefault(name, []).append((dict(labels), value))
+
+        lines = []
+
+        for name, metric in self.metrics.items():
+            lines.append(f'# HELP {name} {metric.help}')
+            lines.append(f'# TYPE {name} {metric.kind}')
+
+            for labels, value in sorted(samples.get(name, []), key=lambda sample: sorted(sample[0].items())):
+                if metric.kind != 'histogram':
+                    lines.append(f'{name}{_labels(labels)} {_number(value)}')
+                    continue
+
+                for bound, count in zip(metric.buckets, value):
+                    lines.append(f'{name}_bucket{_labels({**labels, "le": _number(bound)})} {count}')
+
+                lines.append(f'{name}_bucket{_labels({**labels, "le": "+Inf"})} {value[-1]}')
+                lines.append(f'{name}_sum{_labels(labels)} {_number(value[-2])}')
+                lines.append(f'{name}_count{_labels(labels)} {value[-1]}')
+
+        return '\n'.join(lines) + '\n'
+
+
+def clear(path):
+    """
+    Remove the snapshots and the archive left in the metrics directory
+    `path` by a previous run, so that the totals start from this one.
+    """
+    for file in pathlib.Path(path).glob('*.json'):
+        if file.stem.isdigit() or file.stem == 'archive':
+            file.unlink(missing_ok=True)
+
+
+def _add(a, b):
+    if isinstance(a, list):
+        return [x + y for x, y in zip(a, b)]
+
+    return a + b
+
+
+def _alive(pid):
+    if pid == os.getpid():
+        return True
+
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+
+    return True
+
+
+def _labels(labels):
+    if not labels:
+        return ''
+
+    escaped = (
+        name + '="' + str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') + '"'
+        for name, value in labels.items()
+    )
+    return '{' + ','.join(escaped) + '}'
+
+
+def _number(value):
+    if isinstance(value, float) and math.isinf(value):
+        return '+Inf' if value > 0 else '-Inf'
+
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metrics:
+    """
+    Binds a metrics registry with the metrics of the API to Flask
+    applications, and measures the requests they handle.
+    """
+
+    def init_app(self, app):
+        if not app.config.get('METRICS', True):
+            app.extensions['metrics'] = None
+            return
+
+        path = app.config.get('METRICS_DIR')
+
+        if path:
+            path = pathlib.Path(app.config['DATA_DIR']) / path
+
+        registry = Registry(path, flush_interval=app.config.get('METRICS_FLUSH_INTERVAL', 1.0))
+        registry.histogram('http_request_duration_seconds', 'Duration of HTTP requests, by route.')
+        registry.gauge('http_requests_in_progress', 'HTTP requests being handled.')
+        registry.counter('report_cache_hits_total', 'Report results served from the cache.')
+        registry.counter('report_cache_misses_total', 'Report results not found in the cache.')
+        registry.counter('report_cache_evictions_total', 'Report results evicted from the cache.')
+        registry.counter('report_cache_invalidations_total', 'Report results discarded after a dataset change.')
+        registry.gauge('report_cache_entries', 'Report results in the cache.')
+        registry.gauge('report_cache_bytes', 'Size of the report results in the cache.')
+        registry.counter('report_coalesced_calls_total', 'Report computations requested.')
+        registry.counter('report_coalesced_shared_total', 'Report computations shared with an identical request.')
+        registry.counter('dataset_loads_total', 'Dataset loads, by dataset.')
+        registry.counter('dataset_load_seconds_total', 'Time spent loading datasets, by dataset.')
+        registry.gauge(
+            'dataset_resident_bytes',
+            'Size of the arrays of loaded datasets, by dataset; memory-mapped arrays are shared by processes.',
+            mode='max'
+        )
+        registry.collector(lambda: _report_samples(app))
+        registry.collector(lambda: _dataset_samples(app))
+
+        app.extensions['metrics'] = registry
+
+    def start(self):
+        registry = current_app.extensions.get('metrics')
+
+        if registry is not None:
+            g.metrics_started = time.perf_counter()
+            registry.inc('http_requests_in_progress', method=request.method)
+
+    def finish(self, response):
+        registry = current_app.extensions.get('metrics')
+        started = g.get('metrics_started')
+
+        if registry is not None and started is not None:
+            registry.observe(
+                'http_request_duration_seconds',
+                time.perf_counter() - started,
+                method=request.method,
+                route=request.url_rule.rule if request.url_rule else 'unmatched',
+                status=str(response.status_code),
+            )
+
+        return response
+
+    def teardown(self, exc=None):
+        registry = current_app.extensions.get('metrics')
+
+        if registry is not None and g.pop('metrics_started', None) is not None:
+            registry.inc('http_requests_in_progress', -1.0, method=request.method)
+
+
+def _report_samples(app):
+    cache = app.extensions.get('report_cache')
+    flight = app.extensions.get('report_flight')
+
+    if cache is not None:
+        stats = cache.stats()
+
+        for name in ('hits', 'misses', 'evictions', 'invalidations'):
+            yield f'report_cache_{name}_total', {}, stats[name]
+
+        yield 'report_cache_entries', {}, stats['entries']
+        yield 'report_cache_bytes', {}, stats['bytes']
+
+    if flight is not None:
+        yield 'report_coalesced_calls_total', {}, flight.calls
+        yield 'report_coalesced_shared_total', {}, flight.shared
+
+
+def _dataset_samples(app):
+    store = app.extensions.get('datasets')
+
+    if store is None:
+        return
+
+    for name, handle in store.handles.items():
+        yield 'dataset_loads_total', {'dataset': name}, handle.loads
+        yield 'dataset_load_seconds_total', {'dataset': name}, handle.load_seconds
+        yield 'dataset_resident_bytes', {'dataset': name}, handle.nbytes
+
+
+metrics = Metrics()
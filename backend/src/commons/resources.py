@@ -1,9 +1,20 @@
+import functools
+import hashlib
 import json
+import pathlib
 
-from flask import make_response
+from flask import Response, current_app, g, make_response, request
 from flask_restful import Resource
 from plotly.utils import PlotlyJSONEncoder
 
+from commons import parser
+from commons.cache import MISSING, ResultCache
+from commons.datasets import DatasetRegistry
+from commons.diagnostics import diagnostics
+from commons.flight import SingleFlight
+from commons.serialization import COMPRESSORS, Payload, dumps
+from commons.timing import timing
+
 
 def output_chart_json(data, code, headers=None):
     """Makes a Flask response with a JSON encoded body"""
@@ -20,3 +31,286 @@ class PlotlyChartResource(Resource):
     representations = {
         'application/json': output_chart_json
     }
+
+
+def output_report_json(data, code, headers=None):
+    """Makes a Flask response with a JSON encoded body, NumPy values included"""
+    resp = make_response(dumps(data), code)
+    resp.headers.extend(headers or {})
+    return resp
+
+
+def serve_report(method):
+    """
+    Serve a report method from the result cache; on a miss, compute it once
+    for all concurrent identical requests.
+
+    Results are encoded to JSON, and compressed, once when computed; the
+    cache and the coalesced requests share the encoded payload, which is
+    sent in the content coding the client prefers.
+
+    Successful responses carry an ETag and a Last-Modified date derived from
+    the request, the dataset versions and the code version, so conditional
+    requests for unchanged data are answered with 304 Not Modified before
+    anything is computed, and a deploy changing the responses invalidates
+    them.
+
+    Requests for diagnostics are always computed, and get the diagnostic
+    records in the response.
+
+    The phases of the request are timed (see `commons.timing`): loading the
+    datasets, the cache lookup, the phases the method marks itself, the rest
+    of the method ('report'), encoding, compression and waiting for the
+    result of an identical request.
+    """
+    @functools.wraps(method)
+    def wrapper(*args, **kwargs):
+        resource = method.__self__
+
+        # the report is computed from the same data its versions are read from.
+        DatasetRegistry.view()
+
+        if diagnostics.requested():
+            return _diagnose(method, *args, **kwargs)
+
+        key, versions = resource.request_key(), resource.dataset_versions()
+        timing.mark('datasets')
+        cache = current_app.extensions.get('report_cache')
+        flight = current_app.extensions.get('report_flight')
+        validators, payload = None, MISSING
+
+        if cache is not None:
+            payload = cache.get(key, versions)
+            timing.mark('cache')
+
+        if None not in versions:
+            validators = report_etag(key, versions), resource.last_modified()
+            matched = not_modified(*validators, codings=_codings(payload))
+
+            if matched is not None:
+                response = _with_validators(Response(status=304), (matched, validators[1]))
+                response.vary.add('Accept-Encoding')
+                return response
+
+        if payload is not MISSING:
+            return _respond(payload, validators)
+
+        def compute():
+            result = method(*args, **kwargs)
+            timing.mark('report')
+            payload = Payload.from_result(result)
+            timing.mark('serialize')
+
+            if current_app.config.get('REPORTS_COMPRESS', True):
+                payload.compress(current_app.config.get('REPORTS_COMPRESS_MIN_SIZE', 1024))
+                timing.mark('compress')
+
+            if cache is not None and payload.status < 500:
+                cache.set(key, versions, payload, size=payload.size)
+
+            return payload
+
+        if flight is None:
+            return _respond(compute(), validators)
+
+        payload = flight.do(key + versions, compute)
+        timing.mark('wait')
+        return _respond(payload, validators)
+
+    return wrapper
+
+
+def report_etag(key, versions):
+    """
+    Strong entity tag of a report response, equal across worker processes.
+    Compressed responses use it suffixed with their content coding.
+    """
+    code = current_app.extensions['reports_code']['version']
+    return hashlib.sha256(repr((code, versions, key)).encode()).hexdigest()[:32]
+
+
+def code_version(root):
+    """
+    Version and latest modification time of the Python sources under `root`:
+    `(sha256, timestamp)`.
+    """
+    digest, modified = hashlib.sha256(), 0.0
+
+    for path in sorted(pathlib.Path(root).rglob('*.py')):
+        digest.update(str(path.relative_to(root)).encode() + b'\0' + path.read_bytes() + b'\0')
+        modified = max(modified, path.stat().st_mtime)
+
+    return digest.hexdigest(), modified
+
+
+def not_modified(etag, last_modified, codings=(None,)):
+    """
+    The entity tag matched by the conditional headers of the request, or
+    None. If-None-Match takes precedence over If-Modified-Since, and only
+    matches the tags of the responses in `codings`, the content codings
+    (None for none) this request may be answered in.
+    """
+    if request.if_none_match:
+        for tag in [_variant(etag, encoding) for encoding in codings]:
+            if request.if_none_match.contains_weak(tag):
+                return tag
+
+        return None
+
+    if request.if_modified_since and last_modified is not None:
+        if int(last_modified) <= request.if_modified_since.timestamp():
+            return etag
+
+    return None
+
+
+def _variant(etag, encoding):
+    return f'{etag}-{encoding}' if encoding else etag
+
+
+def _codings(payload):
+    """
+    Content codings, None for none, the response to this request may be
+    sent in: the one it is sent in if `payload` is known; otherwise the
+    body may also be too small to be compressed.
+    """
+    if payload is not MISSING:
+        encodings = list(payload.encodings)
+    else:
+        encodings = list(COMPRESSORS) if current_app.config.get('REPORTS_COMPRESS', True) else []
+
+    encoding = request.accept_encodings.best_match(encodings) if encodings else None
+    return [encoding] if payload is not MISSING or encoding is None else [encoding, None]
+
+
+def _diagnose(method, *args, **kwargs):
+    records = diagnostics.collect()
+    result = method(*args, **kwargs)
+    data, *rest = result if isinstance(result, tuple) else (result,)
+
+    if isinstance(data, dict):
+        data = {**data, 'diagnostics': records}
+
+    response = Payload.from_result((data, *rest)).response()
+    response.headers['Cache-Control'] = 'no-store'
+    return response
+
+
+def _with_validators(response, validators):
+    etag, last_modified = validators
+    response.set_etag(etag)
+
+    if last_modified is not None:
+        response.last_modified = int(last_modified)
+
+    return response
+
+
+def _respond(payload, validators):
+    response = payload.response(request.accept_encodings)
+
+    if validators is not None and payload.status == 200:
+        etag, last_modified = validators
+        encoding = response.headers.get('Content-Encoding')
+        _with_validators(response, (_variant(etag, encoding), last_modified))
+
+    return response
+
+
+class ReportResource(Resource):
+    """
+    Resource whose response depends only on its normalized request arguments
+    and on the datasets named in `depends_on`, which resources whose datasets
+    depend on the request, such as one per country, define as a property.
+
+    Responses are cached until one of those datasets changes, and identical
+    requests made at the same time are answered by a single computation.
+    `default_year` is the year reported when none is requested; None means
+    the latest year of the data (see `latest_year`).
+    """
+    depends_on = ()
+    default_year = None
+    method_decorators = [serve_report]
+    representations = {
+        'application/json': output_report_json
+    }
+
+    def request_year(self):
+        """
+        Requested year, or the default year if missing or invalid.
+        """
+        year = parser.parse(request.args.get('year'), cast=int, default=self.default_year)
+        return self.latest_year() if year is None else year
+
+    def latest_year(self):
+        return None
+
+    def query_args(self):
+        """
+        Normalized request arguments the response depends on. Arguments not
+        listed here, such as cache busters, do not affect caching.
+        """
+        return {'year': self.request_year()}
+
+    def request_key(self):
+        return (
+            request.method,
+            request.endpoint,
+            tuple(sorted((request.view_args or {}).items())),
+            tuple(sorted(self.query_args().items())),
+        )
+
+    def dataset_versions(self):
+        view = g.get('datasets_view', current_app.extensions['datasets'])
+        return tuple(view.version(name) for name in self.depends_on)
+
+    def last_modified(self):
+        """
+        Latest modification time of the datasets and the code, as a
+        timestamp; None if unknown. Call after `dataset_versions`, which loads
+        them.
+        """
+        view = g.get('datasets_view', current_app.extensions['datasets'])
+        times = [view.modified(name) for name in self.depends_on]
+
+        if not times or None in times:
+            return None
+
+        return max(times + [current_app.extensions['reports_code']['modified']])
+
+
+class Reports:
+    """
+    Binds the shared state of report resources to Flask applications.
+    """
+
+    def init_app(self, app):
+        cache = flight = None
+
+        if app.config.get('REPORTS_CACHE', True):
+            cache = ResultCache(
+                max_entries=app.config.get('REPORTS_CACHE_MAX_ENTRIES', 512),
+                max_bytes=app.config.get('REPORTS_CACHE_MAX_BYTES', 64 * 1024 * 1024)
+            )
+
+        if app.config.get('REPORTS_COALESCE', True):
+            lock_dir = app.config.get('REPORTS_COALESCE_DIR')
+
+            if lock_dir:
+                # relative lock directories live inside the data directory.
+                lock_dir = pathlib.Path(app.config['DATA_DIR']) / lock_dir
+
+            flight = SingleFlight(
+                lock_dir, ttl=app.config.get('REPORTS_COALESCE_TTL', 2.0),
+                encode=Payload.to_dict, decode=Payload.from_dict
+            )
+
+        version, modified = code_version(pathlib.Path(__file__).resolve().parent.parent)
+        code = {'version': app.config.get('REPORTS_VERSION') or version, 'modified': modified}
+
+        app.extensions['report_cache'] = cache
+        app.extensions['report_flight'] = flight
+        app.extensions['reports_code'] = code
+
+
+reports = Reports()
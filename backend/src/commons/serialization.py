@@ -0,0 +1,170 @@
+"""
+JSON encoding of report responses.
+
+NumPy arrays and scalars are encoded directly, without converting them to
+Python lists first. orjson is used when it is installed; otherwise the
+standard library encoder is used with the same output rules: UTF-8, and NaN
+or infinite floats as null.
+
+Payloads can also carry gzip, and brotli if installed, compressed copies of
+their body, made once so that serving them costs no compression work.
+"""
+import base64
+import gzip
+import json
+import math
+
+import numpy as np
+from flask import Response
+
+try:
+    import orjson
+except ImportError:  # optional, faster encoder
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # optional, better compression
+    brotli = None
+
+
+# Content codings in order of preference, mapped to their compressors.
+COMPRESSORS = {'gzip': lambda body: gzip.compress(body, compresslevel=9, mtime=0)}
+
+if brotli is not None:
+    COMPRESSORS = {'br': lambda body: brotli.compress(body, quality=9), **COMPRESSORS}
+
+
+def _default(obj):
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+
+    if isinstance(obj, np.generic):
+        return obj.item()
+
+    raise TypeError(f'Object of type {type(obj).__name__} is not JSON serializable')
+
+
+def _finite(obj):
+    """
+    Copy of `obj` with non-finite floats replaced by None.
+    """
+    if isinstance(obj, float):
+        return obj if math.isfinite(obj) else None
+
+    if isinstance(obj, dict):
+        return {key: _finite(value) for key, value in obj.items()}
+
+    if isinstance(obj, (list, tuple)):
+        return [_finite(value) for value in obj]
+
+    if isinstance(obj, (np.ndarray, np.generic)):
+        return _finite(_default(obj))
+
+    return obj
+
+
+def dumps(data):
+    """
+    Encode `data` as JSON bytes, ending with a new line.
+    """
+    if orjson is not None:
+        return orjson.dumps(
+            data, default=_default,
+            option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS | orjson.OPT_APPEND_NEWLINE
+        )
+
+    options = dict(default=_default, ensure_ascii=False, allow_nan=False, separators=(',', ':'))
+
+    try:
+        dumped = json.dumps(data, **options)
+    except ValueError:
+        # NaN or infinity somewhere in the data
+        dumped = json.dumps(_finite(data), **options)
+
+    return (dumped + '\n').encode()
+
+
+class Payload:
+    """
+    Encoded response of a report: status, JSON body, extra headers and
+    compressed copies of the body by content coding.
+    """
+    __slots__ = ('status', 'body', 'headers', 'encodings')
+
+    def __init__(self, status, body, headers=None, encodings=None):
+        self.status = status
+        self.body = body
+        self.headers = dict(headers or {})
+        self.encodings = dict(encodings or {})
+
+    @classmethod
+    def from_result(cls, result):
+        """
+        Encode the return value of a resource method: data, or a
+        `(data, status[, headers])` tuple.
+        """
+        if isinstance(result, tuple):
+            data, status, headers = result + (None,) * (3 - len(result))
+            return cls(200 if status is None else status, dumps(data), headers)
+
+        return cls(200, dumps(result))
+
+    @property
+    def size(self):
+        return len(self.body) + sum(len(body) for body in self.encodings.values())
+
+    def compress(self, min_size=0):
+        """
+        Add the compressed copies of bodies of at least `min_size` bytes,
+        keeping those smaller than the body.
+        """
+        if len(self.body) < min_size:
+            return self
+
+        for encoding, compress in COMPRESSORS.items():
+            body = compress(self.body)
+
+            if len(body) < len(self.body):
+                self.encodings[encoding] = body
+
+        return self
+
+    def response(self, accept_encodings=None):
+        """
+        Response with the body compressed in the content coding preferred by
+        `accept_encodings`, the request's Accept-Encoding header, if any.
+        """
+        body, encoding = self.body, None
+
+        if accept_encodings and self.encodings:
+            encoding = accept_encodings.best_match(list(self.encodings))
+
+        if encoding is not None:
+            body = self.encodings[encoding]
+
+        response = Response(body, status=self.status, mimetype='application/json')
+        response.headers.extend(self.headers)
+
+        if encoding is not None:
+            response.headers['Content-Encoding'] = encoding
+
+        if self.encodings:
+            response.vary.add('Accept-Encoding')
+
+        return response
+
+    def to_dict(self):
+        return {
+            'status': self.status,
+            'body': self.body.decode(),
+            'headers': self.headers,
+            'encodings': {
+                encoding: base64.b64encode(body).decode() for encoding, body in self.encodings.items()
+            },
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        encodings = {encoding: base64.b64decode(body) for encoding, body in data['encodings'].items()}
+        return cls(data['status'], data['body'].encode(), data['headers'], encodings)
@@ -0,0 +1,102 @@
+"""
+Per-request phase timings.
+
+Code handling a request calls `timing.mark(name)` at the end of each phase;
+the time since the previous mark is added to that phase. The phases are sent
+in the `Server-Timing` response header (SERVER_TIMING) and appended as JSON
+lines to a sidecar file (SERVER_TIMING_LOG, relative to DATA_DIR). When both
+are disabled, marks are no-ops.
+"""
+import json
+import pathlib
+import threading
+import time
+
+from flask import current_app, g, request
+
+
+class Timing:
+    """
+    Phase timer of the current request.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        log_path = app.config.get('SERVER_TIMING_LOG')
+
+        if log_path:
+            log_path = pathlib.Path(app.config['DATA_DIR']) / log_path
+            log_path.parent.mkdir(parents=True, exist_ok=True)
+
+        app.extensions['timing'] = {
+            'header': app.config.get('SERVER_TIMING', False),
+            'log_path': log_path or None,
+        }
+
+    def start(self):
+        """
+        Start timing the current request, if enabled.
+        """
+        options = current_app.extensions.get('timing')
+
+        if options and (options['header'] or options['log_path']):
+            now = time.perf_counter()
+            g.timing = {'start': now, 'last': now, 'phases': {}}
+
+    def mark(self, name):
+        """
+        End phase `name` of the current request.
+        """
+        timer = g.get('timing')
+
+        if timer is None:
+            return
+
+        now = time.perf_counter()
+        timer['phases'][name] = timer['phases'].get(name, 0.0) + now - timer['last']
+        timer['last'] = now
+
+    def finish(self, response):
+        """
+        Report the timings of the current request with its response.
+        """
+        timer = g.pop('timing', None)
+
+        if timer is None:
+            return response
+
+        options = current_app.extensions['timing']
+        phases = {name: seconds * 1000 for name, seconds in timer['phases'].items()}
+        total = (time.perf_counter() - timer['start']) * 1000
+
+        if options['header']:
+            response.headers['Server-Timing'] = ', '.join(
+                f'{name};dur={duration:.2f}' for name, duration in [*phases.items(), ('total', total)]
+            )
+            response.headers['Timing-Allow-Origin'] = '*'
+
+        if options['log_path']:
+            self._log(options['log_path'], {
+                'time': time.time(),
+                'method': request.method,
+                'path': request.full_path.rstrip('?'),
+                'endpoint': request.endpoint,
+                'status': response.status_code,
+                'total': round(total, 3),
+                'phases': {name: round(duration, 3) for name, duration in phases.items()},
+            })
+
+        return response
+
+    def _log(self, path, entry):
+        line = json.dumps(entry, ensure_ascii=False) + '\n'
+
+        # one write per line, in append mode, so lines of concurrent
+        # workers do not interleave.
+        with self._lock, open(path, 'a', encoding='utf-8') as f:
+            f.write(line)
+
+
+timing = Timing()
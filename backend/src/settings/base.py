@@ -25,3 +25,95 @@ DEBUG = config('FLASK_DEBUG', True, cast=bool)
 
 ERROR_404_HELP = False
 
+
+# Datasets
+# Report source files live under DATA_DIR. Datasets listed in DATASETS_PRELOAD
+# are loaded when the app is created ('*' loads all), the rest on first use.
+# Parsed frames are cached in DATASETS_CACHE_DIR (relative to DATA_DIR, empty
+# to disable) and source files are checked for changes every
+# DATASETS_CHECK_INTERVAL seconds.
+
+DATA_DIR = BASE_DIR / 'data'
+
+DATASETS_PRELOAD = config('DATASETS_PRELOAD', '', cast=decouple.Csv())
+
+DATASETS_CACHE_DIR = config('DATASETS_CACHE_DIR', '.cache')
+
+DATASETS_CHECK_INTERVAL = config('DATASETS_CHECK_INTERVAL', 10, cast=float)
+
+
+# Reports
+# Report results are cached in process, up to REPORTS_CACHE_MAX_ENTRIES entries
+# and REPORTS_CACHE_MAX_BYTES bytes, until their datasets change.
+# Concurrent identical report requests are computed once and share the result.
+# With REPORTS_COALESCE_DIR (relative to DATA_DIR) set, this also holds across
+# worker processes on a host, through lock files and result files that are
+# kept for REPORTS_COALESCE_TTL seconds.
+# Report responses carry an ETag and Last-Modified date derived from the
+# dataset versions and the code version: REPORTS_VERSION if set (for example
+# the release being deployed), otherwise a hash of the Python sources. They
+# may be reused by clients for REPORTS_MAX_AGE seconds, then served stale for
+# REPORTS_STALE_WHILE_REVALIDATE more seconds while they are revalidated.
+# With REPORTS_COMPRESS, report bodies of at least REPORTS_COMPRESS_MIN_SIZE
+# bytes are compressed once, with gzip and brotli when installed, and cached
+# along with the result.
+
+REPORTS_CACHE = config('REPORTS_CACHE', True, cast=bool)
+
+REPORTS_CACHE_MAX_ENTRIES = config('REPORTS_CACHE_MAX_ENTRIES', 512, cast=int)
+
+REPORTS_CACHE_MAX_BYTES = config('REPORTS_CACHE_MAX_BYTES', 64 * 1024 * 1024, cast=int)
+
+REPORTS_COALESCE = config('REPORTS_COALESCE', True, cast=bool)
+
+REPORTS_COALESCE_DIR = config('REPORTS_COALESCE_DIR', '')
+
+REPORTS_COALESCE_TTL = config('REPORTS_COALESCE_TTL', 2, cast=float)
+
+REPORTS_MAX_AGE = config('REPORTS_MAX_AGE', 60, cast=int)
+
+REPORTS_STALE_WHILE_REVALIDATE = config('REPORTS_STALE_WHILE_REVALIDATE', 300, cast=int)
+
+REPORTS_VERSION = config('REPORTS_VERSION', '')
+
+REPORTS_COMPRESS = config('REPORTS_COMPRESS', True, cast=bool)
+
+REPORTS_COMPRESS_MIN_SIZE = config('REPORTS_COMPRESS_MIN_SIZE', 1024, cast=int)
+
+
+# Diagnostics
+# Reports describe their intermediate results in diagnostic records, logged as
+# JSON lines when DIAGNOSTICS_LEVEL is DEBUG. With DIAGNOSTICS_REQUESTS, a
+# request with `?debug=1` gets the records of its own computation in the
+# response, bypassing the report cache. Otherwise no diagnostics are computed.
+# Since any client can then force a full recomputation, DIAGNOSTICS_REQUESTS
+# must be enabled explicitly, independently of DEBUG.
+
+DIAGNOSTICS_LEVEL = config('DIAGNOSTICS_LEVEL', 'WARNING')
+
+DIAGNOSTICS_REQUESTS = config('DIAGNOSTICS_REQUESTS', False, cast=bool)
+
+
+# Server timing
+# With SERVER_TIMING, responses report the duration of each phase of their
+# handling in a Server-Timing header; off unless enabled explicitly, as it
+# exposes internals to every client. With SERVER_TIMING_LOG (relative to
+# DATA_DIR) set, the same timings are appended to that file as JSON lines.
+
+SERVER_TIMING = config('SERVER_TIMING', False, cast=bool)
+
+SERVER_TIMING_LOG = config('SERVER_TIMING_LOG', '')
+
+
+# Metrics
+# With METRICS, /metrics reports request latencies, report cache and dataset
+# metrics in the Prometheus text format. Each worker process writes its
+# metrics to METRICS_DIR (relative to DATA_DIR; empty keeps them in memory, for
+# a single process) every METRICS_FLUSH_INTERVAL seconds, so that any worker
+# reports the totals of all of them.
+
+METRICS = config('METRICS', True, cast=bool)
+
+METRICS_DIR = config('METRICS_DIR', '.metrics')
+
+METRICS_FLUSH_INTERVAL = config('METRICS_FLUSH_INTERVAL', 1, cast=float)
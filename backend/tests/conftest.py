@@ -0,0 +1,81 @@
+"""
+Fixtures of the backend tests: synthetic data (see
+`benchmarks/generate_data.py`) and applications serving it.
+
+    cd backend && python -m pytest -q
+"""
+import contextlib
+import io
+import os
+import pathlib
+import shutil
+import sys
+
+import pandas as pd
+import pytest
+
+BACKEND_DIR = pathlib.Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR / 'src'))
+sys.path.insert(0, str(BACKEND_DIR / 'benchmarks'))
+
+import generate_data  # noqa: E402
+from app import create_app  # noqa: E402
+
+EXPENDITURE_FILE = 'UN_Tourism_inbound_expenditure_10_2025.csv'
+JAPAN_FILE = 'country_data/JTM_inbound_20251106eng(JAPAN).csv'
+
+
+def generate(output, *options):
+    with contextlib.redirect_stdout(io.StringIO()):
+        generate_data.main(
+            ['--scale', '1', '--first-year', '2015', '--last-year', '2020', '--output', str(output), *options]
+        )
+
+    return output
+
+
+def replace_source(path, transform):
+    """
+    Replace the CSV at `path` by `transform(frame)`, with a modification
+    time different from the previous one even on coarse clocks.
+    """
+    modified = os.stat(path).st_mtime_ns
+    written = path.with_name(f'.{path.name}')
+    transform(pd.read_csv(path)).to_csv(written, index=False)
+    os.utime(written, ns=(modified + 10 ** 9, modified + 10 ** 9))
+    # replaced at once, as a deploy would, so readers never see part of it.
+    os.replace(written, path)
+
+
+@pytest.fixture(scope='session')
+def generated_dir(tmp_path_factory):
+    return generate(tmp_path_factory.mktemp('generated'))
+
+
+@pytest.fixture
+def data_dir(generated_dir, tmp_path):
+    """
+    Copy of the synthetic data the test may change.
+    """
+    return pathlib.Path(shutil.copytree(generated_dir, tmp_path / 'data'))
+
+
+@pytest.fixture
+def make_app():
+    def make_app(data_dir, **settings):
+        return create_app(settings_override={
+            'TESTING': True,
+            'DATA_DIR': data_dir,
+            'DATASETS_CACHE_DIR': '',
+            'DATASETS_CHECK_INTERVAL': 0,
+            'REPORTS_COALESCE_DIR': '',
+            'METRICS_DIR': '',
+            **settings
+        })
+
+    return make_app
+
+
+@pytest.fixture
+def client(make_app, data_dir):
+    return make_app(data_dir).test_client()
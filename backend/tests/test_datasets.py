@@ -0,0 +1,64 @@
+from conftest import EXPENDITURE_FILE, replace_source
+
+from commons.datasets import DatasetRegistry
+
+
+def double_values(frame):
+    return frame.assign(value=frame['value'] * 2)
+
+
+def test_reload_publishes_data_with_its_version(make_app, data_dir):
+    app = make_app(data_dir)
+    store = app.extensions['datasets']
+    before = store.snapshot('expenditure')
+
+    replace_source(data_dir / EXPENDITURE_FILE, double_values)
+    after = store.snapshot('expenditure')
+
+    assert after.version != before.version
+    assert after.data is not before.data
+    assert after.modified > before.modified
+    handle = store.handle('expenditure')
+    assert (handle.version, handle.modified) == (after.version, after.modified)
+
+
+def test_derived_values_follow_their_sources(make_app, data_dir):
+    app = make_app(data_dir)
+    store = app.extensions['datasets']
+    before = store.snapshot('world_expenditure')
+
+    assert store.snapshot('world_expenditure').data is before.data
+
+    replace_source(data_dir / EXPENDITURE_FILE, double_values)
+    after = store.snapshot('world_expenditure')
+
+    assert after.data is not before.data
+    assert after.version == store.snapshot('expenditure').version
+
+
+def test_view_keeps_the_first_snapshot_during_a_reload(make_app, data_dir):
+    app = make_app(data_dir)
+    store = app.extensions['datasets']
+
+    with app.test_request_context('/world-map-expenditure'):
+        view = DatasetRegistry.view()
+        version = view.version('expenditure')
+        table = DatasetRegistry.get('expenditure')
+
+        replace_source(data_dir / EXPENDITURE_FILE, double_values)
+        assert store.version('expenditure') != version
+
+        # the request keeps reading the data its version was read from.
+        assert view.version('expenditure') == version
+        assert DatasetRegistry.get('expenditure') is table
+        assert view.snapshot('world_expenditure').version == version
+        assert view['world_expenditure'] is not store['world_expenditure']
+
+
+def test_unreadable_dataset_has_no_version(make_app, data_dir):
+    (data_dir / EXPENDITURE_FILE).unlink()
+    store = make_app(data_dir).extensions['datasets']
+
+    assert store.version('expenditure') is None
+    assert store.version('world_avg_spending') is None
+    assert store.version('arrivals') is not None
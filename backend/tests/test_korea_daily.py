@@ -0,0 +1,26 @@
+import check_daily
+import pandas as pd
+from conftest import generate
+
+from api.reports.datasets import load_korea_monthly
+
+
+def test_korea_dates_ignore_the_day(tmp_path):
+    path = tmp_path / 'korea.csv'
+    pd.DataFrame({
+        'date': ['2019-1', '2019-1-5', ' 2019-12-31 ', '2019/02', 'total'],
+        'nation': ['China', 'China', 'Japan', 'Japan', 'Japan'],
+        'visitor': [1, 2, 3, 4, 5],
+    }).to_csv(path, index=False)
+
+    frame = load_korea_monthly(path)
+
+    assert frame[['Year', 'Month', 'visitor']].values.tolist() == [[2019, 1, 1], [2019, 1, 2], [2019, 12, 3]]
+    assert 'date' not in frame
+
+
+def test_daily_files_give_the_monthly_values(tmp_path):
+    monthly = check_daily.derived(generate(tmp_path / 'monthly'))
+    daily = check_daily.derived(generate(tmp_path / 'daily', '--daily'))
+
+    assert check_daily.differences(monthly, daily) == []
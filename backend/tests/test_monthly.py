@@ -0,0 +1,57 @@
+import numpy as np
+import pandas as pd
+import pytest
+from conftest import JAPAN_FILE, replace_source
+
+from api.reports.monthly import monthly_frame, source_matrix
+from commons.columnar import ColumnTable
+
+
+def table(**columns):
+    return ColumnTable.from_frame(pd.DataFrame(columns))
+
+
+def test_monthly_frame_projects_the_unified_columns():
+    frame = monthly_frame('KOR', table(
+        Year=[2019, 2019], Month=[1, 2], visitor=[10, 20], nation=['China', 'Japan'], growth=[1.0, 2.0]
+    ))
+
+    assert list(frame.columns) == ['country', 'Year', 'Month', 'visitor', 'nation', 'category']
+    assert [frame[column].dtype for column in ('Year', 'Month', 'visitor')] == [np.int16, np.int8, np.float64]
+    assert frame['nation'].tolist() == ['China', 'Japan']
+    assert frame['category'].isna().all()
+
+
+def test_monthly_frame_requires_the_monthly_columns():
+    with pytest.raises(ValueError, match='XXX lacks columns: Month'):
+        monthly_frame('XXX', table(Year=[2019], visitor=[10]))
+
+
+def test_source_matrix_sums_rows_by_month():
+    matrix = source_matrix('KOR', table(
+        Year=[2018, 2019, 2019, 2019], Month=[1, 1, 1, 3], visitor=[10, 5, 15, np.nan]
+    ))
+
+    assert matrix.years.tolist() == [2018, 2019]
+    assert matrix.values[1, 0] == 20
+    assert np.isnan(matrix.values[1, 2]) and matrix.present[1, 2]
+    assert not matrix.present[1, 1]
+    assert matrix.changes[1, 0] == 100
+
+
+def test_a_missing_source_only_affects_its_country(make_app, data_dir):
+    (data_dir / JAPAN_FILE).unlink()
+    client = make_app(data_dir).test_client()
+
+    assert client.get('/country/JPN/monthly-visitors').status_code == 500
+    assert client.get('/country/KOR/monthly-visitors').status_code == 200
+    assert client.get('/country/KOR/monthly-visitors?years=2018,2019').status_code == 200
+    assert client.get('/monthly-visitors/countries').status_code == 200
+
+
+def test_a_reload_only_affects_its_country(client, data_dir):
+    korea, japan = client.get('/country/KOR/monthly-visitors'), client.get('/country/JPN/monthly-visitors')
+    replace_source(data_dir / JAPAN_FILE, lambda frame: frame.iloc[:-12])
+
+    assert client.get('/country/KOR/monthly-visitors').headers['ETag'] == korea.headers['ETag']
+    assert client.get('/country/JPN/monthly-visitors').headers['ETag'] != japan.headers['ETag']
@@ -0,0 +1,152 @@
+import threading
+
+from conftest import EXPENDITURE_FILE, replace_source
+
+EXPENDITURE_URL = '/world-map-expenditure?year=2019'
+# large enough to be compressed.
+ARRIVALS_URL = '/world-map-data?year=2019'
+
+
+def total(response):
+    return response.get_json()['stats']['total_expenditure']
+
+
+def scale_values(factor):
+    return lambda frame: frame.assign(value=frame['value'] * factor)
+
+
+def test_reload_changes_the_response_and_its_etag(client, data_dir):
+    before = client.get(EXPENDITURE_URL)
+    replace_source(data_dir / EXPENDITURE_FILE, scale_values(2))
+    after = client.get(EXPENDITURE_URL)
+
+    assert after.status_code == 200
+    assert total(after) == 2 * total(before)
+    assert after.headers['ETag'] != before.headers['ETag']
+    assert client.get(EXPENDITURE_URL, headers={'If-None-Match': before.headers['ETag']}).status_code == 200
+    assert client.get(EXPENDITURE_URL, headers={'If-None-Match': after.headers['ETag']}).status_code == 304
+
+
+def test_reload_during_a_request(make_app, data_dir, monkeypatch):
+    from api.reports.world_map_expenditure import WorldMapExpenditureResource
+
+    report = WorldMapExpenditureResource.report
+    reloaded = []
+
+    def report_during_reload(self, year):
+        # the source changes after the request read the dataset versions.
+        if not reloaded:
+            replace_source(data_dir / EXPENDITURE_FILE, scale_values(2))
+            reloaded.append(True)
+
+        return report(self, year)
+
+    expected = total(make_app(data_dir).test_client().get(EXPENDITURE_URL))
+    monkeypatch.setattr(WorldMapExpenditureResource, 'report', report_during_reload)
+    client = make_app(data_dir).test_client()
+
+    first = client.get(EXPENDITURE_URL)
+    second = client.get(EXPENDITURE_URL)
+
+    # the first response is computed from the data its ETag was made from,
+    # and the next one from the reloaded data.
+    assert reloaded
+    assert total(first) == expected
+    assert total(second) == 2 * expected
+    assert first.headers['ETag'] != second.headers['ETag']
+
+
+def test_concurrent_reloads_never_mix_versions(make_app, data_dir):
+    client = make_app(data_dir).test_client()
+    path = data_dir / EXPENDITURE_FILE
+    bodies, errors, done = {}, [], threading.Event()
+
+    def request():
+        while not done.is_set():
+            response = client.get(EXPENDITURE_URL)
+
+            if response.status_code != 200:
+                errors.append(response.status_code)
+                continue
+
+            # a given ETag always comes with the same body.
+            if bodies.setdefault(response.headers['ETag'], total(response)) != total(response):
+                errors.append(response.headers['ETag'])
+
+    threads = [threading.Thread(target=request) for _ in range(4)]
+
+    for thread in threads:
+        thread.start()
+
+    for i in range(10):
+        replace_source(path, scale_values(2 if i % 2 == 0 else 0.5))
+
+    done.set()
+
+    for thread in threads:
+        thread.join()
+
+    # the reports follow the last version of the source.
+    last = client.get(EXPENDITURE_URL)
+    assert not errors
+    assert total(last) == total(make_app(data_dir).test_client().get(EXPENDITURE_URL))
+
+
+def test_etag_matches_only_the_representation_sent(client):
+    gzip = {'Accept-Encoding': 'gzip'}
+    response = client.get(ARRIVALS_URL, headers=gzip)
+    etag = response.headers['ETag'].strip('"')
+
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert etag.endswith('-gzip')
+
+    base = etag[:-len('-gzip')]
+    status = {
+        (tag, encoding): client.get(
+            ARRIVALS_URL, headers={'If-None-Match': f'"{tag}"', 'Accept-Encoding': encoding}
+        ).status_code
+        for tag in (base, etag, f'{base}-br')
+        for encoding in ('gzip', 'identity')
+    }
+
+    assert status == {
+        (base, 'gzip'): 200,
+        (base, 'identity'): 304,
+        (etag, 'gzip'): 304,
+        (etag, 'identity'): 200,
+        (f'{base}-br', 'gzip'): 200,
+        (f'{base}-br', 'identity'): 200,
+    }
+
+
+def test_not_modified_response(client):
+    response = client.get(ARRIVALS_URL, headers={'Accept-Encoding': 'gzip'})
+    not_modified = client.get(
+        ARRIVALS_URL, headers={'If-None-Match': response.headers['ETag'], 'Accept-Encoding': 'gzip'}
+    )
+
+    assert not_modified.status_code == 304
+    assert not_modified.data == b''
+    assert not_modified.headers['ETag'] == response.headers['ETag']
+    assert 'Accept-Encoding' in not_modified.headers['Vary']
+
+
+def test_if_modified_since(client, data_dir):
+    response = client.get(EXPENDITURE_URL)
+    last_modified = response.headers['Last-Modified']
+
+    assert client.get(EXPENDITURE_URL, headers={'If-Modified-Since': last_modified}).status_code == 304
+
+    replace_source(data_dir / EXPENDITURE_FILE, scale_values(2))
+    assert client.get(EXPENDITURE_URL, headers={'If-Modified-Since': last_modified}).status_code == 200
+
+
+def test_etag_without_compression(make_app, data_dir):
+    client = make_app(data_dir, REPORTS_COMPRESS=False).test_client()
+    etag = client.get(ARRIVALS_URL, headers={'Accept-Encoding': 'gzip'}).headers['ETag'].strip('"')
+
+    assert not etag.endswith('-gzip')
+    assert client.get(ARRIVALS_URL, headers={'If-None-Match': f'"{etag}"'}).status_code == 304
+    assert client.get(
+        ARRIVALS_URL, headers={'If-None-Match': f'"{etag}-gzip"', 'Accept-Encoding': 'gzip'}
+    ).status_code == 200
@@ -4,6 +4,7 @@ https://docs.gunicorn.org/en/stable/settings.html#settings
 """
 import os
 import multiprocessing
+import pathlib
 
 
 # Chdir to specified directory before apps loading.
@@ -38,3 +39,27 @@ max_requests_jitter = os.getenv('GUNICORN_WORKER_MAX_REQUESTS_JITTER', default=5
 # Workers silent for more than this many seconds are killed and restarted.
 # https://docs.gunicorn.org/en/stable/settings.html#timeout
 timeout = os.getenv('GUNICORN_WORKER_TIMEOUT', default=30)
+
+
+#########
+# Hooks #
+#########
+
+# Called just before the master process is initialized.
+# https://docs.gunicorn.org/en/stable/settings.html#on-starting
+def on_starting(server):
+    """
+    Clear the metrics snapshots of the previous run of the workers, so that
+    /metrics reports the totals of this run only and a new worker does not
+    take over the counters of an old one with the same pid. Those of the
+    workers exiting during the run are folded by /metrics itself.
+    """
+    from flask import Config
+
+    from commons.metrics import clear
+
+    settings = Config(chdir)
+    settings.from_pyfile(os.environ.get('FLASK_SETTINGS_FILE', 'settings/development.py'))
+
+    if settings.get('METRICS', True) and settings.get('METRICS_DIR'):
+        clear(pathlib.Path(settings['DATA_DIR']) / settings['METRICS_DIR'])
@@ -1,21 +1,38 @@
 import request from '@/utils/http.js'
 
 /**
- * 獲取日本每月遊客數量
+ * 獲取有月度遊客數據的國家
  */
-export function getJapanMonthlyVisitorsAPI(year) {
+export function getMonthlyVisitorsCountriesAPI() {
     return request({
-        url: '/country/JPN/monthly-visitors',
-        params: { year }
+        url: '/monthly-visitors/countries'
     })
 }
 
+// 有月度數據的國家代碼，只請求一次
+let monthlyVisitorsCountryCodes = null
+
 /**
- * 獲取韓國每月遊客數量
+ * 獲取有月度遊客數據的國家代碼（快取請求結果，失敗時下次重新請求）
  */
-export function getKoreaMonthlyVisitorsAPI(year) {
+export function getMonthlyVisitorsCountryCodes() {
+    if (!monthlyVisitorsCountryCodes) {
+        monthlyVisitorsCountryCodes = getMonthlyVisitorsCountriesAPI()
+            .then(data => data.countries.map(country => country.country_code))
+            .catch(error => {
+                monthlyVisitorsCountryCodes = null
+                throw error
+            })
+    }
+    return monthlyVisitorsCountryCodes
+}
+
+/**
+ * 獲取國家每月遊客數量（僅限 getMonthlyVisitorsCountryCodes 中的國家）
+ */
+export function getCountryMonthlyVisitorsAPI(countryCode, year) {
     return request({
-        url: '/country/KOR/monthly-visitors',
+        url: `/country/${countryCode}/monthly-visitors`,
         params: { year }
     })
 }
@@ -28,4 +45,34 @@ export function getCountryExpenditureBreakdownAPI(countryCode, year) {
         url: `/country/${countryCode}/expenditure-breakdown`,
         params: { year }
     })
+}
+
+/**
+ * 獲取國家摘要（四項指標的數值與世界排名）
+ */
+export function getCountrySummaryAPI(countryCode, year) {
+    return request({
+        url: `/country/${countryCode}/summary`,
+        params: { year }
+    })
+}
+
+/**
+ * 獲取韓國入境遊客按目的或年齡的分佈
+ */
+export function getKoreaBreakdownAPI(dimension, year, month, nation) {
+    return request({
+        url: '/country/KOR/breakdown',
+        params: { dimension, year, month, nation }
+    })
+}
+
+/**
+ * 獲取韓國主要客源國排名
+ */
+export function getKoreaSourceMarketsAPI(year, month, k) {
+    return request({
+        url: '/country/KOR/source-markets',
+        params: { year, month, k }
+    })
 }
\ No newline at end of file
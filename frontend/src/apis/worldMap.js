@@ -38,4 +38,14 @@ export function getWorldMapCrowdScoreAPI(year) {
         url: '/world-map-crowd-score',
         params: { year }
     })
+}
+
+/**
+ * 獲取世界地圖多年度數據（國家 × 年份 矩陣）
+ */
+export function getWorldMapSeriesAPI(metric, from, to) {
+    return request({
+        url: '/world-map-data/series',
+        params: { metric, from, to }
+    })
 }
\ No newline at end of file